@@ -1,45 +1,116 @@
 """FastHTML annotation tool for chunk relevance evaluation."""
 
-import json
+import atexit
+import hashlib
+import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
 
+import orjson
 from fasthtml.common import *
-from queries import TEST_QUERIES
+from queries import TEST_QUERIES, TEST_QUERIES_BY_ID
+from starlette.responses import StreamingResponse
+from storage import AnnotationLog, AnnotationWriter, load_annotations
 
 # Load chunks data  
 CHUNKS_FILE = Path("chunks.jsonl") 
-ANNOTATIONS_FILE = Path("annotations.json")
 
-def load_chunks() -> List[Dict]:
-    """Load chunks from JSONL file."""
-    chunks = []
+def index_chunks() -> Tuple[List[str], Dict[str, Tuple[int, int]], Optional[BinaryIO]]:
+    """Scan chunks.jsonl once, recording each chunk's byte offset and length.
+
+    The file is returned still open: update_chunks.py swaps chunks.jsonl out with
+    os.replace, and reads through this handle stay on the file the offsets index.
+    """
+    order = []
+    offsets = {}
+    if not CHUNKS_FILE.exists():
+        return order, offsets, None
+
+    f = open(CHUNKS_FILE, 'rb')
+    offset = 0
+    for line in f:
+        if line.strip():
+            chunk_id = orjson.loads(line)["id"]
+            order.append(chunk_id)
+            offsets[chunk_id] = (offset, len(line))
+        offset += len(line)
+    return order, offsets, f
+
+def read_chunk(chunk_id: str) -> Dict:
+    """Read a single chunk from the indexed chunks file using the offset index."""
+    offset, length = chunk_offsets[chunk_id]
+    # pread doesn't move a shared file position, so concurrent requests can't interleave seeks
+    return orjson.loads(os.pread(chunks_file.fileno(), length, offset))
+
+def stream_export() -> Iterator[bytes]:
+    """Stream the export JSON, passing chunk records through from chunks.jsonl unparsed."""
+    # Snapshot annotations up front so concurrent submits don't change the export mid-stream
+    annotations_json = orjson.dumps(annotations)
+    
+    yield b'{"queries":' + orjson.dumps(TEST_QUERIES) + b',"chunks":['
+    
     if CHUNKS_FILE.exists():
-        with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        with open(CHUNKS_FILE, 'rb') as f:
+            first = True
             for line in f:
-                if line.strip():
-                    chunks.append(json.loads(line))
-    return chunks
+                line = line.strip()
+                if line:
+                    yield line if first else b"," + line
+                    first = False
+    
+    yield b'],"annotations":' + annotations_json
+    yield b',"export_timestamp":' + orjson.dumps(str(datetime.now())) + b'}'
 
-def load_annotations() -> Dict:
-    """Load existing annotations."""
-    if ANNOTATIONS_FILE.exists():
-        with open(ANNOTATIONS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+def export_etag() -> str:
+    """ETag for /export derived from the chunks file and the in-memory annotation revision."""
+    chunks_mtime = CHUNKS_FILE.stat().st_mtime_ns if CHUNKS_FILE.exists() else 0
+    state = f"{chunks_mtime}-{APP_STARTED_NS}-{annotation_revision}"
+    return '"' + hashlib.sha1(state.encode()).hexdigest() + '"'
 
-def save_annotations(annotations: Dict) -> None:
-    """Save annotations to JSON file."""
-    with open(ANNOTATIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(annotations, f, indent=2)
+def set_annotation(query_id: str, chunk_id: str, relevance: int) -> None:
+    """Record an annotation in memory, queue it for the log, and bump the export revision."""
+    global annotation_revision
+
+    annotations.setdefault(query_id, {})[chunk_id] = {
+        "relevance": relevance,
+        "timestamp": str(datetime.now())
+    }
+    annotation_revision += 1
+
+    annotation_writer.put(query_id, chunk_id, annotations[query_id][chunk_id])
+    advance_cursor(query_id)
+
+def advance_cursor(query_id: str) -> int:
+    """Move a query's cursor past already-annotated chunks and return it."""
+    query_annotations = annotations.get(query_id, {})
+    idx = next_idx.get(query_id, 0)
+    while idx < len(chunk_order) and chunk_order[idx] in query_annotations:
+        idx += 1
+    next_idx[query_id] = idx
+    return idx
 
 # Initialize FastHTML app
 app, rt = fast_app()
 
-# Global state
-chunks_data = load_chunks()
+# Global state: only chunk ids and file offsets are kept in memory
+chunk_order, chunk_offsets, chunks_file = index_chunks()
 annotations = load_annotations()
+annotation_log = AnnotationLog(annotations)
+
+# Counts in-memory annotation changes, so /export's ETag changes before the log is flushed
+APP_STARTED_NS = time.time_ns()
+annotation_revision = 0
+
+# Submit handlers enqueue writes; a background thread batches them into the log
+annotation_writer = AnnotationWriter(annotation_log)
+atexit.register(annotation_writer.close)
+
+# Index of the next unannotated chunk per query
+next_idx: Dict[str, int] = {}
+for query_info in TEST_QUERIES:
+    advance_cursor(query_info["id"])
 
 @rt("/")
 def get():
@@ -49,7 +120,7 @@ def get():
         # Count completed annotations
         query_id = query_info["id"]
         completed = len(annotations.get(query_id, {}))
-        total = len(chunks_data)
+        total = len(chunk_order)
         
         button = A(
             Div(
@@ -67,7 +138,7 @@ def get():
     return Titled("Chunk Relevance Annotation Tool",
         Container(
             H1("Select Query to Annotate", cls="mb-4"),
-            P(f"Total chunks: {len(chunks_data)}", cls="text-muted mb-4"),
+            P(f"Total chunks: {len(chunk_order)}", cls="text-muted mb-4"),
             Div(*query_buttons),
             A("View Results", href="/results", cls="btn btn-primary mt-4")
         )
@@ -77,20 +148,16 @@ def get():
 def get(query_id: str):
     """Annotation interface for a specific query."""
     # Find query info
-    query_info = next((q for q in TEST_QUERIES if q["id"] == query_id), None)
+    query_info = TEST_QUERIES_BY_ID.get(query_id)
     if not query_info:
         return "Query not found", 404
     
     # Get current annotations for this query
     query_annotations = annotations.get(query_id, {})
     
-    # Find next unannotated chunk
-    current_chunk_idx = 0
-    for i, chunk in enumerate(chunks_data):
-        if chunk["id"] not in query_annotations:
-            current_chunk_idx = i
-            break
-    else:
+    # Next unannotated chunk is tracked by the query's cursor
+    current_chunk_idx = next_idx[query_id]
+    if current_chunk_idx >= len(chunk_order):
         # All chunks annotated
         return Titled("Annotation Complete!",
             Container(
@@ -100,7 +167,7 @@ def get(query_id: str):
             )
         )
     
-    current_chunk = chunks_data[current_chunk_idx]
+    current_chunk = read_chunk(chunk_order[current_chunk_idx])
     
     # Get sliding window context (previous, current, next)
     context_chunks = []
@@ -108,28 +175,28 @@ def get(query_id: str):
     # Add previous chunk if exists
     if current_chunk_idx > 0:
         context_chunks.append({
-            "chunk": chunks_data[current_chunk_idx - 1],
+            "chunk": read_chunk(chunk_order[current_chunk_idx - 1]),
             "is_current": False,
             "position": "previous"
         })
     
     # Add current chunk (always present)
     context_chunks.append({
-        "chunk": chunks_data[current_chunk_idx],
+        "chunk": current_chunk,
         "is_current": True,
         "position": "current"
     })
     
     # Add next chunk if exists
-    if current_chunk_idx < len(chunks_data) - 1:
+    if current_chunk_idx < len(chunk_order) - 1:
         context_chunks.append({
-            "chunk": chunks_data[current_chunk_idx + 1],
+            "chunk": read_chunk(chunk_order[current_chunk_idx + 1]),
             "is_current": False,
             "position": "next"
         })
     
     progress = len(query_annotations)
-    total = len(chunks_data)
+    total = len(chunk_order)
     
     return Titled(f"Annotating: {query_info['query'][:50]}...",
         Container(
@@ -210,37 +277,17 @@ def get(query_id: str):
     )
 
 @rt("/annotate_submit", methods=["POST"])
-def post(query_id: str, chunk_id: str, relevance: str):
+async def post(query_id: str, chunk_id: str, relevance: str):
     """Submit annotation."""
-    global annotations
-    
-    if query_id not in annotations:
-        annotations[query_id] = {}
-    
-    annotations[query_id][chunk_id] = {
-        "relevance": int(relevance),
-        "timestamp": str(datetime.now())
-    }
-    
-    save_annotations(annotations)
+    set_annotation(query_id, chunk_id, int(relevance))
     
     # Redirect back to annotation page
     return RedirectResponse(f"/annotate/{query_id}", status_code=303)
 
 @rt("/skip/{query_id}/{chunk_id}")  
-def get(query_id: str, chunk_id: str):
+async def get(query_id: str, chunk_id: str):
     """Skip a chunk (mark as -1)."""
-    global annotations
-    
-    if query_id not in annotations:
-        annotations[query_id] = {}
-    
-    annotations[query_id][chunk_id] = {
-        "relevance": -1,  # -1 means skipped
-        "timestamp": str(datetime.now())
-    }
-    
-    save_annotations(annotations)
+    set_annotation(query_id, chunk_id, -1)  # -1 means skipped
     return RedirectResponse(f"/annotate/{query_id}", status_code=303)
 
 @rt("/results")
@@ -248,7 +295,7 @@ def get():
     """View annotation results and statistics."""
     stats = []
     
-    for query_info in TEST_QUERIES:
+    for query_info in TEST_QUERIES_BY_ID.values():
         query_id = query_info["id"]
         query_annotations = annotations.get(query_id, {})
         
@@ -264,8 +311,8 @@ def get():
             "not_relevant": not_relevant_count,
             "skipped": skipped_count,
             "total_annotated": total_annotated,
-            "total_chunks": len(chunks_data),
-            "completion": f"{total_annotated}/{len(chunks_data)}"
+            "total_chunks": len(chunk_order),
+            "completion": f"{total_annotated}/{len(chunk_order)}"
         })
     
     return Titled("Annotation Results",
@@ -304,19 +351,19 @@ def get():
     )
 
 @rt("/export")
-def get():
+def get(request: Request):
     """Export annotations as JSON."""
-    export_data = {
-        "queries": TEST_QUERIES,
-        "chunks": chunks_data,
-        "annotations": annotations,
-        "export_timestamp": str(datetime.now())
-    }
+    etag = export_etag()
+    cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=cache_headers)
     
-    return Response(
-        json.dumps(export_data, indent=2),
-        headers={"Content-Type": "application/json",
-                "Content-Disposition": "attachment; filename=annotations_export.json"}
+    return StreamingResponse(
+        stream_export(),
+        media_type="application/json",
+        headers={"Content-Disposition": "attachment; filename=annotations_export.json",
+                 **cache_headers}
     )
 
 if __name__ == "__main__":
@@ -1,35 +1,64 @@
 """Evaluation tools for comparing human annotations with MxBai reranker scores."""
 
-import json
+import hashlib
+import os
+import re
 from pathlib import Path
 from typing import Dict, List, Tuple
 import numpy as np
-from sklearn.metrics import precision_recall_fscore_support, roc_auc_score, roc_curve
+import orjson
+from sklearn.metrics import precision_recall_curve, precision_recall_fscore_support, roc_auc_score, roc_curve
+
+from storage import ANNOTATIONS_FILE, ANNOTATIONS_LOG, load_annotations
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    prange = range
+    HAS_NUMBA = False
+
+EVAL_CACHE_DIR = Path(".eval_cache")
+EVAL_CACHE_FILE = EVAL_CACHE_DIR / "evaluation.json"
+
+# Bump when the cached result's layout changes
+EVAL_CACHE_VERSION = 1
+
+# chunks.jsonl records are written with "id" as the first key
+CHUNK_ID_RE = re.compile(rb'^\{"id"\s*:\s*"([^"\\]+)"')
+
+# Inputs whose modification times key the evaluation cache
+EVAL_INPUTS = [Path("chunks.jsonl"), ANNOTATIONS_FILE, ANNOTATIONS_LOG, Path("../scores.jsonl"), Path("queries.py")]
+
+# Source files whose contents key the evaluation cache, so metric changes invalidate it
+EVAL_CODE = [__file__, Path(__file__).with_name("storage.py")]
+
+# Above this many scored chunks the threshold sweep runs in the Numba kernel
+NUMBA_SWEEP_MIN = 1000
 
 
 def load_evaluation_data() -> Tuple[List[Dict], Dict, Dict]:
     """Load chunks, annotations, and scores for evaluation."""
     
-    # Load chunks
+    # Load chunk ids only; the evaluator never looks at chunk text
     chunks = []
-    with open("chunks.jsonl", 'r', encoding='utf-8') as f:
+    with open("chunks.jsonl", 'rb') as f:
         for line in f:
             if line.strip():
-                chunks.append(json.loads(line))
+                match = CHUNK_ID_RE.match(line)
+                chunk_id = match.group(1).decode() if match else orjson.loads(line)["id"]
+                chunks.append({"id": chunk_id})
     
-    # Load annotations
-    annotations = {}
-    if Path("annotations.json").exists():
-        with open("annotations.json", 'r', encoding='utf-8') as f:
-            annotations = json.load(f)
+    # Load annotations (snapshot plus any logged writes)
+    annotations = load_annotations()
     
     # Load scores
     scores = {}
     if Path("../scores.jsonl").exists():
-        with open("../scores.jsonl", 'r', encoding='utf-8') as f:
+        with open("../scores.jsonl", 'rb') as f:
             for line in f:
                 if line.strip():
-                    score_data = json.loads(line)
+                    score_data = orjson.loads(line)
                     scores[score_data["id"]] = score_data["score"]
     
     return chunks, annotations, scores
@@ -65,23 +94,78 @@ def calculate_f1_at_threshold(human_labels: List[int], scores: List[float], thre
     }
 
 
+def f1_sweep(labels: np.ndarray, scores: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """F1 at each threshold, counting true/false positives with prefix sums over sorted scores."""
+    order = np.argsort(scores)
+    sorted_scores = scores[order]
+    
+    # positives_before[j] = relevant chunks among the j lowest scores
+    positives_before = np.zeros(len(scores) + 1, dtype=np.int64)
+    positives_before[1:] = np.cumsum(labels[order])
+    total_positive = positives_before[-1]
+    
+    f1 = np.zeros(len(thresholds), dtype=np.float64)
+    for i in prange(len(thresholds)):
+        first = np.searchsorted(sorted_scores, thresholds[i])
+        predicted_positive = len(scores) - first
+        true_positive = total_positive - positives_before[first]
+        if true_positive > 0:
+            precision = true_positive / predicted_positive
+            recall = true_positive / total_positive
+            f1[i] = 2 * precision * recall / (precision + recall)
+    
+    return f1
+
+
+if HAS_NUMBA:
+    f1_sweep = njit(parallel=True, cache=True)(f1_sweep)
+
+
 def find_optimal_threshold(human_labels: List[int], scores: List[float]) -> Dict:
     """Find the optimal threshold that maximizes F1 score."""
     if not human_labels or not scores:
         return {"threshold": 0.0, "f1": 0.0, "precision": 0.0, "recall": 0.0}
     
-    # Try a range of thresholds
-    thresholds = np.percentile(scores, np.arange(0, 101, 5))  # 0%, 5%, 10%, ..., 100%
-    thresholds = np.unique(thresholds)  # Remove duplicates
+    if len(set(human_labels)) == 1:
+        # Single-class labels: precision/recall curves are undefined, sweep percentiles
+        thresholds = np.percentile(scores, np.arange(0, 101, 5))  # 0%, 5%, 10%, ..., 100%
+        thresholds = np.unique(thresholds)  # Remove duplicates
+        
+        best_result = {"f1": -1}
+        
+        for threshold in thresholds:
+            result = calculate_f1_at_threshold(human_labels, scores, threshold)
+            if result["f1"] > best_result["f1"]:
+                best_result = result
+        
+        return best_result
+    
+    if HAS_NUMBA and len(scores) > NUMBA_SWEEP_MIN:
+        labels_arr = np.asarray(human_labels, dtype=np.int64)
+        scores_arr = np.asarray(scores, dtype=np.float64)
+        thresholds = np.unique(scores_arr)
+        f1 = f1_sweep(labels_arr, scores_arr, thresholds)
+        best = int(np.argmax(f1))
+        result = calculate_f1_at_threshold(human_labels, scores, float(thresholds[best]))
+        del result["predictions"]
+        return result
     
-    best_result = {"f1": -1}
+    # Precision and recall at every distinct score threshold in one pass
+    precision, recall, thresholds = precision_recall_curve(np.asarray(human_labels), np.asarray(scores))
     
-    for threshold in thresholds:
-        result = calculate_f1_at_threshold(human_labels, scores, threshold)
-        if result["f1"] > best_result["f1"]:
-            best_result = result
+    # The final point (precision=1, recall=0) has no threshold
+    precision = precision[:-1]
+    recall = recall[:-1]
+    f1 = 2 * precision * recall / (precision + recall + 1e-12)
     
-    return best_result
+    best = int(np.argmax(f1))
+    
+    return {
+        "threshold": float(thresholds[best]),
+        "precision": float(precision[best]),
+        "recall": float(recall[best]),
+        "f1": float(f1[best])
+    }
 
 
 def evaluate_query(query_id: str, chunks: List[Dict], annotations: Dict, scores: Dict) -> Dict:
@@ -191,9 +275,38 @@ def run_full_evaluation() -> Dict:
     }
 
 
+def eval_cache_key() -> str:
+    """Key for the evaluation cache: input mtimes plus the evaluation code itself."""
+    mtimes = "|".join(f"{path}:{path.stat().st_mtime_ns if path.exists() else 0}" for path in EVAL_INPUTS)
+    code = hashlib.sha1(b"".join(Path(module).read_bytes() for module in EVAL_CODE)).hexdigest()
+    return f"v{EVAL_CACHE_VERSION}|{code}|{mtimes}"
+
+
+def cached_full_evaluation() -> Dict:
+    """Run the full evaluation, reusing the cached result when neither inputs nor code have changed."""
+    key = eval_cache_key()
+    
+    if EVAL_CACHE_FILE.exists():
+        with open(EVAL_CACHE_FILE, 'rb') as f:
+            cached = orjson.loads(f.read())
+        if cached.get("key") == key:
+            return cached["evaluation"]
+    
+    evaluation = run_full_evaluation()
+    
+    # A single entry: each new result replaces the previous one
+    EVAL_CACHE_DIR.mkdir(exist_ok=True)
+    tmp_file = EVAL_CACHE_FILE.with_suffix(".json.tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(orjson.dumps({"key": key, "evaluation": evaluation}, option=orjson.OPT_SERIALIZE_NUMPY))
+    os.replace(tmp_file, EVAL_CACHE_FILE)
+    
+    return evaluation
+
+
 def generate_evaluation_report() -> str:
     """Generate a human-readable evaluation report."""
-    evaluation = run_full_evaluation()
+    evaluation = cached_full_evaluation()
     
     report = []
     report.append("# MxBai Reranker Evaluation Report\n")
@@ -38,3 +38,6 @@ TEST_QUERIES = [
         "type": "conceptual"
     }
 ]
+
+# Queries indexed by id for constant-time lookup
+TEST_QUERIES_BY_ID = {q["id"]: q for q in TEST_QUERIES}
@@ -0,0 +1,172 @@
+"""Annotation persistence: a JSON snapshot plus an append-only JSONL log."""
+
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+ANNOTATIONS_FILE = Path("annotations.json")
+ANNOTATIONS_LOG = Path("annotations.log.jsonl")
+
+# Fold the log into the snapshot once it outgrows the snapshot by this factor
+COMPACT_RATIO = 10
+COMPACT_MIN_BYTES = 64 * 1024
+
+# {"relevance": int, "timestamp": str}
+AnnotationRecord = dict[str, Any]
+# query id -> chunk id -> record
+Annotations = dict[str, dict[str, AnnotationRecord]]
+# (query id, chunk id, record)
+AnnotationWrite = tuple[str, str, AnnotationRecord]
+
+
+def load_annotations() -> Annotations:
+    """Load the annotations snapshot and replay the log on top of it."""
+    annotations: Annotations = {}
+    if ANNOTATIONS_FILE.exists():
+        with open(ANNOTATIONS_FILE, 'rb') as f:
+            annotations = orjson.loads(f.read())
+
+    if ANNOTATIONS_LOG.exists():
+        with open(ANNOTATIONS_LOG, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Torn line from an interrupted write
+                    continue
+                annotations.setdefault(entry["q"], {})[entry["c"]] = {
+                    "relevance": entry["r"],
+                    "timestamp": entry["t"]
+                }
+
+    return annotations
+
+
+def save_annotations(annotations: Annotations) -> None:
+    """Atomically write a full annotations snapshot."""
+    tmp_file = ANNOTATIONS_FILE.with_suffix(".json.tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(orjson.dumps(annotations, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, ANNOTATIONS_FILE)
+
+
+class AnnotationLog:
+    """Append-only log of annotation writes, compacted into the snapshot as it grows."""
+
+    def __init__(self, annotations: Annotations) -> None:
+        """Open the log for appending; `annotations` is the live in-memory dict."""
+        self.annotations = annotations
+        self.snapshot_size = ANNOTATIONS_FILE.stat().st_size if ANNOTATIONS_FILE.exists() else 0
+        self.file = open(ANNOTATIONS_LOG, 'ab')
+        self.torn = False
+
+    def append(self, query_id: str, chunk_id: str, record: AnnotationRecord) -> None:
+        """Append one annotation to the log."""
+        self.append_many([(query_id, chunk_id, record)])
+
+    def append_many(self, writes: list[AnnotationWrite]) -> None:
+        """Append several annotations to the log with a single flush."""
+        try:
+            if self.torn:
+                self.file.write(b"\n")
+            self.file.writelines(
+                orjson.dumps({"q": query_id, "c": chunk_id, "r": record["relevance"], "t": record["timestamp"]}) + b"\n"
+                for query_id, chunk_id, record in writes
+            )
+            self.file.flush()
+        except OSError:
+            # A failed write can leave a partial line; start the next append on a fresh one
+            self.torn = True
+            raise
+        self.torn = False
+
+        if self.file.tell() > max(COMPACT_RATIO * self.snapshot_size, COMPACT_MIN_BYTES):
+            self.compact()
+
+    def compact(self) -> None:
+        """Write a fresh snapshot and truncate the log."""
+        # Snapshot first: replaying a stale log over a new snapshot is harmless
+        save_annotations(self.annotations)
+        self.snapshot_size = ANNOTATIONS_FILE.stat().st_size
+        self.file.seek(0)
+        self.file.truncate()
+
+
+class AnnotationWriter:
+    """Background thread that batches queued annotation writes into the log."""
+
+    def __init__(self, log: AnnotationLog, interval: float = 0.1, max_batch: int = 64) -> None:
+        """Start the writer; pending writes are flushed every `interval` seconds or `max_batch` items."""
+        self.log = log
+        self.interval = interval
+        self.max_batch = max_batch
+        self.queue: queue.Queue[AnnotationWrite] = queue.Queue()
+        self.stop_event = threading.Event()
+        # Last failed log write; its annotations are retried with the next batch
+        self.error: Exception | None = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, query_id: str, chunk_id: str, record: AnnotationRecord) -> None:
+        """Queue an annotation for writing, raising if earlier writes are still failing."""
+        self.queue.put((query_id, chunk_id, record))
+        self.raise_error()
+
+    def raise_error(self) -> None:
+        """Raise the most recent write failure, if the log hasn't recovered from it."""
+        if self.error is not None:
+            raise RuntimeError(f"Annotation log writes are failing: {self.error}") from self.error
+
+    def close(self) -> None:
+        """Flush pending writes and stop the writer thread, raising if any could not be written."""
+        self.stop_event.set()
+        self.thread.join()
+        self.raise_error()
+
+    def _write(self, batch: list[AnnotationWrite]) -> bool:
+        """Append a batch to the log, recording rather than raising any failure."""
+        try:
+            self.log.append_many(batch)
+        except Exception as e:
+            print(f"Warning: Could not write {len(batch)} annotations to {ANNOTATIONS_LOG}: {e}")
+            self.error = e
+            return False
+
+        self.error = None
+        return True
+
+    def _run(self) -> None:
+        """Drain the queue in batches until closed."""
+        failed: list[AnnotationWrite] = []
+
+        while not (self.stop_event.is_set() and self.queue.empty()):
+            try:
+                batch: list[AnnotationWrite] = [self.queue.get(timeout=self.interval)]
+            except queue.Empty:
+                if not failed:
+                    continue
+                batch = []
+
+            # Let a burst of clicks accumulate unless enough are already pending
+            if self.queue.qsize() < self.max_batch:
+                self.stop_event.wait(self.interval)
+
+            try:
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            # Failed writes go first so the log keeps their order
+            batch = failed + batch
+            failed = [] if self._write(batch) else batch
+
+        # Last attempt for writes still failing at shutdown; close() reports the outcome
+        if failed:
+            self._write(failed)
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """Script to regenerate chunks for annotation with updated configuration."""
 
+import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -27,6 +29,22 @@ def run_command(cmd: str, cwd: str = None) -> bool:
         return False
 
 
+def copy_file(src: Path, dst: Path) -> bool:
+    """Copy a file over `dst` atomically and return success status."""
+    print(f"Copying: {src} -> {dst}")
+    # Copy beside the target and rename it into place, so `dst` is never missing or partial
+    tmp_dst = dst.with_name(dst.name + ".tmp")
+    try:
+        shutil.copyfile(src, tmp_dst)
+        os.replace(tmp_dst, dst)
+        print("✅ Success")
+        return True
+    except OSError as e:
+        tmp_dst.unlink(missing_ok=True)
+        print(f"❌ Failed: {e}")
+        return False
+
+
 def main():
     """Update chunks for annotation."""
     print("🔄 Updating annotation chunks...")
@@ -40,7 +58,13 @@ def main():
     if annotations_file.exists():
         backup_file = Path("annotation_tool/annotations_backup.json")
         print(f"📂 Backing up existing annotations to {backup_file}")
-        subprocess.run(f"cp {annotations_file} {backup_file}", shell=True)
+        shutil.copyfile(annotations_file, backup_file)
+
+    annotations_log = Path("annotation_tool/annotations.log.jsonl")
+    if annotations_log.exists():
+        backup_log = Path("annotation_tool/annotations_backup.log.jsonl")
+        print(f"📂 Backing up annotation log to {backup_log}")
+        shutil.copyfile(annotations_log, backup_log)
     
     # Activate virtual environment and regenerate chunks
     cmd = """
@@ -58,20 +82,20 @@ def main():
     # Copy new chunks to annotation tool
     print("\n📁 Copying chunks to annotation tool...")
     
-    # Backup old chunks
+    # Backup old chunks; the original stays in place until the new copy replaces it
     old_chunks = Path("annotation_tool/chunks.jsonl")
     if old_chunks.exists():
         backup_chunks = Path("annotation_tool/chunks_backup.jsonl")
-        subprocess.run(f"cp {old_chunks} {backup_chunks}", shell=True)
+        shutil.copy2(old_chunks, backup_chunks)
         print(f"📂 Backed up old chunks to {backup_chunks}")
     
     # Copy new chunks
-    if not run_command("cp chunks.jsonl annotation_tool/", cwd=str(parent_dir)):
+    if not copy_file(parent_dir / "chunks.jsonl", parent_dir / "annotation_tool" / "chunks.jsonl"):
         print("❌ Failed to copy chunks")
         sys.exit(1)
     
     # Copy new scores  
-    if not run_command("cp scores.jsonl annotation_tool/", cwd=str(parent_dir)):
+    if not copy_file(parent_dir / "scores.jsonl", parent_dir / "annotation_tool" / "scores.jsonl"):
         print("❌ Failed to copy scores")
         sys.exit(1)
     
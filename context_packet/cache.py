@@ -0,0 +1,69 @@
+"""Content-addressed on-disk cache of parsed documents."""
+
+import os
+from pathlib import Path
+from typing import Protocol
+
+import orjson
+
+from .ingest import FileInfo
+from .parser import ParsedDocument
+
+# Bump when parse output or the stored fields change, so older entries are never reused
+PARSE_CACHE_VERSION = 1
+
+
+class CachedParser(Protocol):
+    """What the cache needs from a parser: its output and the backend that produced it."""
+
+    def parse(self, file_info: FileInfo) -> ParsedDocument:
+        """Parse the file and return extracted text."""
+        ...
+
+    def backend(self, file_info: FileInfo) -> str:
+        """Name the extraction backend and settings used for this file."""
+        ...
+
+
+def cache_path(file_info: FileInfo, cache_dir: str | Path, backend: str) -> Path:
+    """Return the cache file for a file's content hash as parsed by `backend`."""
+    name = f"{file_info.file_id}.v{PARSE_CACHE_VERSION}.{backend}.json"
+    return Path(cache_dir) / file_info.content_hash[:2] / name
+
+
+def _read_entry(path: Path, file_info: FileInfo) -> ParsedDocument | None:
+    """Load a cache entry, or None when it is missing, corrupt or truncated."""
+    try:
+        data = orjson.loads(path.read_bytes())
+        # Identical content may live at a different path than when it was cached,
+        # so only the parse output is stored and the current file_info is attached
+        return ParsedDocument(file_info=file_info, **data)
+    except (OSError, orjson.JSONDecodeError, TypeError):
+        return None
+
+
+def get_or_parse(file_info: FileInfo, parser: CachedParser, cache_dir: str | Path) -> ParsedDocument:
+    """Return the cached parse of a file's content, parsing and caching it on a miss.
+
+    Unreadable entries count as misses and are overwritten by the fresh parse.
+    """
+    path = cache_path(file_info, cache_dir, parser.backend(file_info))
+
+    doc = _read_entry(path, file_info)
+    if doc is not None:
+        return doc
+
+    doc = parser.parse(file_info)
+
+    # Write to a per-process temp file and rename so readers never see partial JSON
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps({
+        'text': doc.text,
+        'media_type': doc.media_type,
+        'page_count': doc.page_count,
+        'metadata': doc.metadata
+    }))
+    os.replace(tmp_path, path)
+
+    return doc
@@ -1,14 +1,20 @@
 """Text chunking with sliding window approach."""
 
+import functools
+import multiprocessing
+import os
 from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 
+import numpy as np
 import tiktoken
-from pydantic import BaseModel
 
 from .parser import ParsedDocument
 
 
-class Chunk(BaseModel):
+@dataclass(slots=True)
+class Chunk:
     """A chunk of text with metadata."""
 
     id: str
@@ -21,14 +27,42 @@ class Chunk(BaseModel):
     end_offset: int
 
 
+@dataclass(slots=True)
+class ChunkTable:
+    """Column-oriented sizes of a list of chunks, for vectorized sorting and batching."""
+
+    tokens: np.ndarray        # int32 token count per chunk
+    text_lengths: np.ndarray  # int32 character count per chunk
+
+    @classmethod
+    def from_chunks(cls, chunks: list[Chunk]) -> "ChunkTable":
+        """Build the table in one pass over each column."""
+        return cls(
+            tokens=np.fromiter((chunk.tokens for chunk in chunks), dtype=np.int32, count=len(chunks)),
+            text_lengths=np.fromiter((len(chunk.text) for chunk in chunks), dtype=np.int32, count=len(chunks))
+        )
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(encoding_name: str) -> tiktoken.Encoding:
+    """Return a shared tiktoken encoding, constructing it only once per name."""
+    return tiktoken.get_encoding(encoding_name)
+
+
 def count_tokens(text: str, encoding_name: str = "cl100k_base") -> int:
     """Count tokens in text using tiktoken."""
-    encoding = tiktoken.get_encoding(encoding_name)
+    encoding = _get_encoding(encoding_name)
     return len(encoding.encode(text))
 
 
 def create_citation(file_hash: str, media_type: str, start: int, end: int) -> str:
-    """Create citation in format §{file_sha256}:{media}:{start}:{end}."""
+    """Create citation in format §{file_sha256}:{media}:{start}:{end}.
+
+    `file_hash` is a FileInfo.file_id, so non-SHA-256 digests carry their algorithm (`blake3-...`).
+    """
     media_short = media_type[0].upper()  # 'P' for pdf, 'H' for html, 'T' for text
     return f"§{file_hash}:{media_short}:{start}:{end}"
 
@@ -36,11 +70,12 @@ def create_citation(file_hash: str, media_type: str, start: int, end: int) -> st
 class SlidingWindowChunker:
     """Sliding window chunker that extracts middle segments."""
 
-    def __init__(self, chunk_size: int = 512, overlap: int = 256):
-        """Initialize chunker with size and overlap parameters."""
+    def __init__(self, chunk_size: int = 512, overlap: int = 256, num_threads: int | None = None):
+        """Initialize chunker with size and overlap parameters; `num_threads` bounds batched decoding."""
         self.chunk_size = chunk_size
         self.overlap = overlap
-        self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.encoding = _get_encoding("cl100k_base")
 
         if overlap >= chunk_size:
             raise ValueError("Overlap must be less than chunk_size")
@@ -52,90 +87,133 @@ class SlidingWindowChunker:
     def chunk_document(self, doc: ParsedDocument) -> Iterator[Chunk]:
         """Chunk document using sliding window approach."""
         # Tokenize the full document
-        tokens = self.encoding.encode(doc.text)
+        tokens = self.encoding.encode_ordinary(doc.text)
+
+        yield from self.chunk_document_from_tokens(doc, tokens)
+
+    def chunk_document_from_tokens(self, doc: ParsedDocument, tokens: list[int]) -> Iterator[Chunk]:
+        """Chunk a document whose text has already been tokenized."""
+        # Chunker parameters are fixed at construction; bind them as locals once
+        chunk_size = self.chunk_size
+        step = chunk_size - self.overlap
+        padding = self.padding
+        middle_size = self.middle_size
+        encoding = self.encoding
+        n_tokens = len(tokens)
 
-        if len(tokens) <= self.chunk_size:
+        if n_tokens <= chunk_size:
             # Document is smaller than chunk size, return as single chunk
-            chunk_text = self.encoding.decode(tokens)
+            chunk_text = encoding.decode(tokens)
 
             yield Chunk(
-                id=f"{doc.file_info.sha256[:8]}_c0",
-                doc_id=doc.file_info.sha256,
+                id=f"{doc.file_info.content_hash[:8]}_c0",
+                doc_id=doc.file_info.file_id,
                 order=0,
                 text=chunk_text,
-                tokens=len(tokens),
+                tokens=n_tokens,
                 citation=create_citation(
-                    doc.file_info.sha256,
+                    doc.file_info.file_id,
                     doc.media_type,
                     0,
-                    len(tokens)
+                    n_tokens
                 ),
                 start_offset=0,
-                end_offset=len(tokens)
+                end_offset=n_tokens
             )
             return
 
-        chunk_order = 0
-        position = 0
+        # First pass: compute the middle segment boundaries of every window at once
+        starts = np.arange(0, n_tokens, step)
+        ends = np.minimum(starts + chunk_size, n_tokens)
 
-        while position < len(tokens):
-            # Define window boundaries
-            window_start = position
-            window_end = min(position + self.chunk_size, len(tokens))
+        # Full windows contribute their middle segment; the partial windows
+        # at the end use their entire remaining content
+        full = ends - starts >= chunk_size
+        middle_starts = np.where(full, starts + padding, starts)
+        middle_ends = np.where(full, middle_starts + middle_size, ends)
 
-            # Extract middle segment for scoring
-            if window_end - window_start >= self.chunk_size:
-                # Full window: extract middle segment
-                middle_start = window_start + self.padding
-                middle_end = middle_start + self.middle_size
-            else:
-                # Partial window at end: use entire remaining content
-                middle_start = window_start
-                middle_end = window_end
+        ranges = list(zip(middle_starts.tolist(), middle_ends.tolist(), strict=True))
 
-            # Ensure we don't go beyond token boundaries
-            middle_start = max(window_start, middle_start)
-            middle_end = min(window_end, middle_end)
+        # Decode all middle segments in a single batched call
+        texts = encoding.decode_batch(
+            [tokens[start:end] for start, end in ranges],
+            num_threads=self.num_threads
+        )
 
-            if middle_start >= middle_end:
-                break
+        # Per-document invariants, hoisted out of the emit loop
+        sha_full = doc.file_info.file_id
+        sha8 = doc.file_info.content_hash[:8]
+        media_short = doc.media_type[0].upper()
 
-            # Extract text for the middle segment
-            middle_tokens = tokens[middle_start:middle_end]
-            chunk_text = self.encoding.decode(middle_tokens)
-
-            # Create chunk
+        # Second pass: emit chunks from the precomputed texts
+        for chunk_order, ((middle_start, middle_end), chunk_text) in enumerate(zip(ranges, texts, strict=True)):
             yield Chunk(
-                id=f"{doc.file_info.sha256[:8]}_c{chunk_order}",
-                doc_id=doc.file_info.sha256,
+                id=f"{sha8}_c{chunk_order}",
+                doc_id=sha_full,
                 order=chunk_order,
                 text=chunk_text,
-                tokens=len(middle_tokens),
-                citation=create_citation(
-                    doc.file_info.sha256,
-                    doc.media_type,
-                    middle_start,
-                    middle_end
-                ),
+                tokens=middle_end - middle_start,
+                # Same format as create_citation
+                citation=f"§{sha_full}:{media_short}:{middle_start}:{middle_end}",
                 start_offset=middle_start,
                 end_offset=middle_end
             )
 
-            chunk_order += 1
 
-            # Move position by step size (chunk_size - overlap)
-            step_size = self.chunk_size - self.overlap
-            position += step_size
+# Below this many documents, process startup outweighs parallel chunking; the
+# inline path still tokenizes the batch across threads
+PARALLEL_CHUNK_MIN_DOCS = 8
+
+# Per-process chunker used by chunk_documents' worker pool
+_worker_chunker: SlidingWindowChunker | None = None
 
 
-def chunk_documents(docs: list[ParsedDocument], chunker: SlidingWindowChunker) -> list[Chunk]:
+def _init_chunk_worker(chunk_size: int, overlap: int) -> None:
+    """Build the chunker once in each worker process."""
+    global _worker_chunker
+    # The pool already spans the cores; threads inside each worker would oversubscribe them
+    _worker_chunker = SlidingWindowChunker(chunk_size=chunk_size, overlap=overlap, num_threads=1)
+
+
+def _chunk_one(doc: ParsedDocument) -> list[Chunk]:
+    """Chunk a single document inside a worker process."""
+    assert _worker_chunker is not None
+    return list(_worker_chunker.chunk_document(doc))
+
+
+def chunk_documents(
+    docs: list[ParsedDocument],
+    chunker: SlidingWindowChunker,
+    max_workers: int | None = None
+) -> list[Chunk]:
     """Chunk multiple documents and return all chunks with global ordering."""
     all_chunks = []
     global_order = 0
 
-    for doc in docs:
-        doc_chunks = list(chunker.chunk_document(doc))
-
+    workers = min(max_workers or os.cpu_count() or 1, len(docs))
+
+    if workers > 1 and len(docs) >= PARALLEL_CHUNK_MIN_DOCS:
+        # Chunk documents in parallel processes; map preserves input order. Spawn, as
+        # for parsing: forking after the pipeline has started threads can deadlock
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_chunk_worker,
+            initargs=(chunker.chunk_size, chunker.overlap)
+        ) as executor:
+            per_doc_chunks = list(executor.map(_chunk_one, docs))
+    else:
+        # Tokenize all documents in one call; tiktoken spreads the batch across threads
+        tokens_list = chunker.encoding.encode_ordinary_batch(
+            [doc.text for doc in docs],
+            num_threads=chunker.num_threads
+        )
+        per_doc_chunks = [
+            list(chunker.chunk_document_from_tokens(doc, tokens))
+            for doc, tokens in zip(docs, tokens_list, strict=True)
+        ]
+
+    for doc_chunks in per_doc_chunks:
         # Update global order for each chunk
         for chunk in doc_chunks:
             chunk.order = global_order
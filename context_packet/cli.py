@@ -6,8 +6,8 @@ from pathlib import Path
 
 from .chunker import SlidingWindowChunker, chunk_documents
 from .config import Config, create_default_config, load_config
-from .ingest import ingest_corpus
-from .parser import DocumentParser
+from .ingest import FileInfo, iter_unique_files, print_ingest_summary, walk_directory
+from .parse_pool import parse_documents
 from .scorer import ChunkScorer, write_scores_jsonl
 from .writer import write_chunks_jsonl
 
@@ -83,58 +83,51 @@ def run_pipeline(config: Config, corpus_path: str, output_dir: str, query: str |
     if query:
         print(f"Query: {query}")
 
-    # Step 1: Ingest corpus
-    print("\n1. Ingesting corpus...")
-    files = ingest_corpus(corpus_path, config)
+    # Step 1: Ingest and parse corpus
+    print("\n1. Ingesting and parsing corpus...")
+    seen: dict[str, FileInfo] = {}
+    dupes: dict[str, list[str]] = {}
 
-    if not files:
+    # Files stream from hashing straight into the parsers. Duplicate contents are
+    # parsed once; chunk ids and citations are keyed on the content hash, so the
+    # copies would only have produced repeated chunks
+    files = iter_unique_files(walk_directory(corpus_path, config), seen, dupes)
+    docs = parse_documents(files, max_workers=config.parse_workers, cache_dir=config.cache_dir)
+
+    print_ingest_summary(corpus_path, list(seen.values()), dupes)
+
+    if not seen:
         print("No files found in corpus!")
         return
 
-    # Step 2: Parse documents
-    print("\n2. Parsing documents...")
-    parser = DocumentParser()
-    docs = []
-
-    for file_info in files:
-        try:
-            if parser.can_parse(file_info):
-                doc = parser.parse(file_info)
-                docs.append(doc)
-                print(f"  Parsed {file_info.relative_path} ({len(doc.text)} chars)")
-            else:
-                print(f"  Skipped {file_info.relative_path} (no parser)")
-        except Exception as e:
-            print(f"  Error parsing {file_info.relative_path}: {e}")
-
     print(f"Successfully parsed {len(docs)} documents")
 
     if dry_run:
         print("Dry run complete - stopping before chunking")
         return
 
-    # Step 3: Chunk documents
-    print("\n3. Chunking documents...")
+    # Step 2: Chunk documents
+    print("\n2. Chunking documents...")
     chunker = SlidingWindowChunker(
         chunk_size=config.chunk_size,
         overlap=config.chunk_overlap
     )
 
-    chunks = chunk_documents(docs, chunker)
+    chunks = chunk_documents(docs, chunker, max_workers=config.chunk_workers)
 
     total_tokens = sum(chunk.tokens for chunk in chunks)
     print(f"Created {len(chunks)} chunks with {total_tokens} total tokens")
 
-    # Step 4: Output chunks if requested
+    # Step 3: Output chunks if requested
     if dump_chunks:
         output_path = Path(output_dir) / "chunks.jsonl"
         write_chunks_jsonl(chunks, output_path)
 
-    # Step 5: Score chunks if query provided
+    # Step 4: Score chunks if query provided
     if query:
-        print("\n4. Scoring chunks against query...")
-        scorer = ChunkScorer(config, use_mock=False)  # Use real scorer
-        scored_chunks = scorer.score_chunks(query, chunks)
+        print("\n3. Scoring chunks against query...")
+        with ChunkScorer(config, use_mock=False) as scorer:  # Use real scorer
+            scored_chunks = scorer.score_chunks(query, chunks)
 
         avg_score = sum(sc.score for sc in scored_chunks) / len(scored_chunks)
         print(f"Scored {len(scored_chunks)} chunks, average score: {avg_score:.3f}")
@@ -1,10 +1,17 @@
 """Configuration management for ContextPacket."""
 
+from functools import cached_property
 from pathlib import Path
+from typing import Any, Literal
 
 import yaml
 from pydantic import BaseModel, Field
 
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml-backed parser
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
 
 class Config(BaseModel):
     """Configuration for ContextPacket pipeline."""
@@ -12,6 +19,7 @@ class Config(BaseModel):
     # Chunking parameters
     chunk_size: int = Field(default=512, description="Size of each chunk in tokens")
     chunk_overlap: int = Field(default=256, description="Overlap between chunks (chunk_size/2)")
+    chunk_workers: int | None = Field(default=None, description="Worker processes for chunking (null = CPU count)")
 
     # Token budgets
     large_limit: int = Field(default=32000, description="Token limit for large context")
@@ -22,6 +30,30 @@ class Config(BaseModel):
     score_threshold: float | None = Field(default=None, description="Score threshold (null = auto)")
     model_path: str = Field(default="mixedbread-ai/mxbai-rerank-base-v2", description="Path to reranker model")
     batch_size: int = Field(default=32, description="Batch size for scoring")
+    token_budget: int | None = Field(
+        default=None,
+        description=(
+            "Padded tokens per scoring batch, replacing batch_size (null = fixed batch_size); approximate, "
+            "since lengths are tiktoken counts rather than the scoring model's own tokenizer"
+        )
+    )
+    scorer_backend: Literal["torch", "onnx"] = Field(
+        default="onnx",
+        description="CrossEncoder inference backend (onnx falls back to torch when unavailable)"
+    )
+    scorer_quantize: bool = Field(
+        default=False,
+        description="Use an INT8-quantized model; requires the onnx backend with optimum and onnxruntime installed"
+    )
+    scorer_fp16: bool = Field(default=True, description="Run PyTorch scoring models in FP16 on CUDA")
+    scorer_token_cache: int = Field(
+        default=0,
+        description="Chunks whose cross-encoder tokens are kept for reuse by later queries (0 = off)"
+    )
+    scorer_workers: int = Field(
+        default=1,
+        description="MxBai scoring processes on CPU-only hosts, each holding a model copy (1 = in-process)"
+    )
 
     # File processing
     include_extensions: list[str] = Field(
@@ -32,27 +64,49 @@ class Config(BaseModel):
         description="File extensions to process"
     )
     recursive: bool = Field(default=True, description="Recurse into subdirectories")
+    hash_algo: Literal["sha256", "blake3"] = Field(
+        default="sha256",
+        description="File content hash algorithm; changing it changes chunk ids, so existing annotations no longer match"
+    )
+    io_workers: int | None = Field(default=None, description="Threads for file hashing (null = Python default)")
+    parse_workers: int | None = Field(default=None, description="Worker processes for parsing (null = CPU count)")
+
+    # Cache of parsed documents keyed by content hash
+    cache_dir: str | None = Field(default=None, description="Parsed document cache directory (null = disabled)")
 
     # Output
     output_dir: str = Field(default=".", description="Output directory")
 
+    @cached_property
+    def include_extension_set(self) -> frozenset[str]:
+        """Normalized include_extensions for constant-time membership checks."""
+        return frozenset(ext.lower().lstrip('.') for ext in self.include_extensions)
+
+    @classmethod
+    def fast_load(cls, config_path: str | Path) -> "Config":
+        """Load a trusted configuration file without running field validation."""
+        return cls.model_construct(**_read_config_yaml(config_path))
+
     def __post_init__(self) -> None:
         """Validate configuration after initialization."""
         if self.chunk_overlap >= self.chunk_size:
             raise ValueError("chunk_overlap must be less than chunk_size")
 
 
-def load_config(config_path: str | Path) -> Config:
-    """Load configuration from YAML file."""
+def _read_config_yaml(config_path: str | Path) -> dict[str, Any]:
+    """Read a YAML configuration file into a dict."""
     config_path = Path(config_path)
 
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
 
     with open(config_path, encoding='utf-8') as f:
-        config_data = yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader) or {}
 
-    return Config(**config_data)
+
+def load_config(config_path: str | Path) -> Config:
+    """Load configuration from YAML file."""
+    return Config(**_read_config_yaml(config_path))
 
 
 def create_default_config(output_path: str | Path) -> None:
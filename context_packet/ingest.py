@@ -1,39 +1,146 @@
 """File ingestion and directory walking for ContextPacket."""
 
 import hashlib
-from collections.abc import Iterator
+import mmap
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
 
-from pydantic import BaseModel
+try:
+    from blake3 import blake3
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
 
 from .config import Config
 
+# Read size for hashing; large blocks keep per-read overhead negligible
+HASH_BLOCK_SIZE = 1024 * 1024
 
-class FileInfo(BaseModel):
+# Extensions parsed from their path; everything else is read once during hashing
+PATH_PARSED_EXTENSIONS = {'pdf'}
+
+# Files hashed (and loaded) ahead of the consumer, per hashing thread
+HASH_WINDOW_PER_WORKER = 2
+
+
+@dataclass(slots=True)
+class FileInfo:
     """Information about an ingested file."""
 
     path: Path
-    sha256: str
+    content_hash: str  # Hex digest of the contents under hash_algo
     size: int
     extension: str
     relative_path: str
+    hash_algo: str = "sha256"
+    # File contents captured while hashing, so parsers needn't reopen the file
+    raw_bytes: bytes | None = field(default=None, repr=False)
+
+    @property
+    def file_id(self) -> str:
+        """Content hash qualified by its algorithm; a bare SHA-256 digest for the default algorithm.
+
+        Used for doc ids, citations and cache keys, so digests from different
+        algorithms are never mistaken for one another.
+        """
+        if self.hash_algo == "sha256":
+            return self.content_hash
+        return f"{self.hash_algo}-{self.content_hash}"
+
+    @property
+    def sha256(self) -> str:
+        """SHA-256 digest of the contents; the field's name before other hash algorithms existed."""
+        if self.hash_algo != "sha256":
+            raise AttributeError(f"sha256 is not available for files hashed with {self.hash_algo}")
+        return self.content_hash
 
 
-def compute_file_hash(file_path: Path) -> str:
-    """Compute SHA-256 hash of a file."""
+def compute_file_hash(file_path: Path, algo: str = "sha256") -> str:
+    """Compute SHA-256 (or BLAKE3) hash of a file."""
+    if algo == "blake3":
+        if not HAS_BLAKE3:
+            raise ImportError("blake3 required for hash_algo='blake3'")
+
+        # Memory-maps the file and hashes it across threads
+        blake3_hasher = blake3(max_threads=blake3.AUTO)
+        blake3_hasher.update_mmap(file_path)
+        return str(blake3_hasher.hexdigest())
+
     hasher = hashlib.sha256()
 
     with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            hasher.update(chunk)
+        try:
+            # Hash the whole file in one C-level update over a memory mapping
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
+        except (OSError, ValueError):
+            # Empty files (and some filesystems) can't be mapped; read in blocks
+            for chunk in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                hasher.update(chunk)
 
     return hasher.hexdigest()
 
 
+def hash_and_load(file_path: Path, algo: str = "sha256") -> tuple[str, bytes]:
+    """Read a file once, returning its hash and its contents."""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    if algo == "blake3":
+        if not HAS_BLAKE3:
+            raise ImportError("blake3 required for hash_algo='blake3'")
+        return str(blake3(data, max_threads=blake3.AUTO).hexdigest()), data
+
+    return hashlib.sha256(data).hexdigest(), data
+
+
 def should_include_file(file_path: Path, config: Config) -> bool:
     """Check if file should be included based on extension."""
-    extension = file_path.suffix.lower().lstrip('.')
-    return extension in config.include_extensions
+    return file_path.suffix[1:].lower() in config.include_extension_set
+
+
+def _hash_file(file_path: Path, algo: str, load: bool) -> tuple[str, bytes | None]:
+    """Hash a file and return its digest, plus its contents when `load` is set."""
+    if load:
+        return hash_and_load(file_path, algo)
+
+    return compute_file_hash(file_path, algo), None
+
+
+def _scan(directory: str, recursive: bool) -> Iterator[os.DirEntry[str]]:
+    """Yield non-hidden file entries, each directory's files before its subdirectories."""
+    files = []
+    subdirs = []
+
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Skip hidden files and hidden directories entirely
+                if entry.name.startswith('.'):
+                    continue
+
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            subdirs.append(entry.path)
+                    # Follows symlinks, so links to files are kept and links to directories dropped
+                    elif entry.is_file():
+                        files.append(entry)
+                except OSError:
+                    continue
+    except OSError as e:
+        # Unreadable directories are skipped rather than aborting the walk
+        print(f"Warning: Could not read directory {directory}: {e}")
+
+    yield from files
+
+    for subdir in subdirs:
+        yield from _scan(subdir, recursive)
 
 
 def walk_directory(corpus_path: str | Path, config: Config) -> Iterator[FileInfo]:
@@ -46,45 +153,82 @@ def walk_directory(corpus_path: str | Path, config: Config) -> Iterator[FileInfo
     if not corpus_path.is_dir():
         raise ValueError(f"Corpus path is not a directory: {corpus_path}")
 
-    # Use glob pattern based on recursive setting
-    pattern = "**/*" if config.recursive else "*"
+    # Collect candidates first so hashing can overlap across files; the extension
+    # check works on the entry name so excluded files are never stat'ed
+    candidates = []
+    for entry in _scan(str(corpus_path), config.recursive):
+        extension = os.path.splitext(entry.name)[1][1:].lower()
+        if extension in config.include_extension_set:
+            candidates.append((entry, extension))
 
-    for file_path in corpus_path.glob(pattern):
-        # Skip directories and hidden files/dirs
-        if file_path.is_dir() or file_path.name.startswith('.'):
-            continue
+    # hashlib releases the GIL while hashing, so threads overlap reads and digests;
+    # only a small window of files is in flight so loaded contents stay bounded
+    max_workers = config.io_workers or min(32, (os.cpu_count() or 1) + 4)
+    window = HASH_WINDOW_PER_WORKER * max_workers
 
-        # Check if file extension is included
-        if not should_include_file(file_path, config):
-            continue
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: deque[tuple[os.DirEntry[str], str, Future[tuple[str, bytes | None]]]] = deque()
 
-        try:
-            # Compute file hash and metadata
-            file_hash = compute_file_hash(file_path)
-            file_size = file_path.stat().st_size
-            extension = file_path.suffix.lower().lstrip('.')
-            relative_path = str(file_path.relative_to(corpus_path))
-
-            yield FileInfo(
-                path=file_path,
-                sha256=file_hash,
-                size=file_size,
-                extension=extension,
-                relative_path=relative_path
-            )
-
-        except (OSError, PermissionError) as e:
-            # Log error but continue processing other files
-            print(f"Warning: Could not process {file_path}: {e}")
+        def submit(batch: Iterable[tuple[os.DirEntry[str], str]]) -> None:
+            for entry, extension in batch:
+                load = extension not in PATH_PARSED_EXTENSIONS
+                future = executor.submit(_hash_file, Path(entry.path), config.hash_algo, load)
+                in_flight.append((entry, extension, future))
+
+        pending = iter(candidates)
+        submit(islice(pending, window))
+
+        while in_flight:
+            entry, extension, future = in_flight.popleft()
+            # Refill the window as each file is handed to the consumer
+            submit(islice(pending, 1))
+
+            file_path = Path(entry.path)
+            try:
+                # Compute file hash and metadata
+                file_hash, raw_bytes = future.result()
+                file_size = entry.stat().st_size
+                relative_path = str(file_path.relative_to(corpus_path))
+
+                yield FileInfo(
+                    path=file_path,
+                    content_hash=file_hash,
+                    size=file_size,
+                    extension=extension,
+                    relative_path=relative_path,
+                    hash_algo=config.hash_algo,
+                    raw_bytes=raw_bytes
+                )
+
+            except (OSError, PermissionError) as e:
+                # Log error but continue processing other files
+                print(f"Warning: Could not process {file_path}: {e}")
+                continue
+
+
+def iter_unique_files(
+    files: Iterable[FileInfo],
+    seen: dict[str, FileInfo],
+    dupes: dict[str, list[str]]
+) -> Iterator[FileInfo]:
+    """Yield the first file for each content hash, recording later copies' paths in `dupes`."""
+    for file_info in files:
+        if file_info.file_id in seen:
+            dupes.setdefault(file_info.file_id, []).append(file_info.relative_path)
             continue
 
+        seen[file_info.file_id] = file_info
+        yield file_info
 
-def ingest_corpus(corpus_path: str | Path, config: Config) -> list[FileInfo]:
-    """Ingest entire corpus and return list of file information."""
-    files = list(walk_directory(corpus_path, config))
 
+def print_ingest_summary(corpus_path: str | Path, files: list[FileInfo], dupes: dict[str, list[str]]) -> None:
+    """Print file counts by extension and the number of duplicates skipped."""
     print(f"Ingested {len(files)} files from {corpus_path}")
 
+    n_dupes = sum(len(paths) for paths in dupes.values())
+    if n_dupes:
+        print(f"  Skipped {n_dupes} duplicate files")
+
     # Group by extension for summary
     by_ext: dict[str, int] = {}
     for file_info in files:
@@ -94,4 +238,23 @@ def ingest_corpus(corpus_path: str | Path, config: Config) -> list[FileInfo]:
     for ext, count in sorted(by_ext.items()):
         print(f"  {ext}: {count} files")
 
+
+def ingest_corpus(corpus_path: str | Path, config: Config) -> list[FileInfo]:
+    """Ingest entire corpus and return one file per distinct content."""
+    files, _ = ingest_corpus_with_duplicates(corpus_path, config)
     return files
+
+
+def ingest_corpus_with_duplicates(
+    corpus_path: str | Path,
+    config: Config
+) -> tuple[list[FileInfo], dict[str, list[str]]]:
+    """Ingest entire corpus, returning unique files and the duplicate paths of each."""
+    seen: dict[str, FileInfo] = {}
+    # Content hash -> relative paths of later copies of the first file with that content
+    dupes: dict[str, list[str]] = {}
+
+    files = list(iter_unique_files(walk_directory(corpus_path, config), seen, dupes))
+    print_ingest_summary(corpus_path, files, dupes)
+
+    return files, dupes
@@ -0,0 +1,198 @@
+"""Loading and caching of the scoring models."""
+
+import contextlib
+import functools
+import os
+import shutil
+import tempfile
+import threading
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+    HAS_DOTENV = True
+except ImportError:
+    HAS_DOTENV = False
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+try:
+    from sentence_transformers import CrossEncoder
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+# CrossEncoder's ONNX backend needs both Optimum and ONNX Runtime
+HAS_ONNX = find_spec('onnxruntime') is not None and find_spec('optimum') is not None
+
+try:
+    from huggingface_hub import login
+    from mxbai_rerank import MxbaiRerankV2
+    HAS_MXBAI = True
+except ImportError:
+    HAS_MXBAI = False
+
+# Where INT8-quantized ONNX exports of cross-encoder models are kept
+QUANTIZED_MODEL_CACHE = Path.home() / ".cache" / "context_packet"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+# Loaded scoring models kept per process, shared by every scorer with the same settings
+MODEL_CACHE_SIZE = 4
+_model_cache_lock = threading.Lock()
+
+
+@functools.cache
+def configure_torch_threads() -> None:
+    """Give PyTorch one intra-op thread per core; runs once, before the first model load."""
+    if not HAS_TORCH:
+        return
+
+    torch.set_num_threads(os.cpu_count() or 1)
+    with contextlib.suppress(RuntimeError):
+        # Only allowed before any inter-op parallel work has started
+        torch.set_num_interop_threads(2)
+
+
+def inference_mode() -> contextlib.AbstractContextManager[Any]:
+    """Disable autograd tracking for model calls when torch is available."""
+    return torch.inference_mode() if HAS_TORCH else contextlib.nullcontext()
+
+
+def half_on_cuda(module: Any) -> None:
+    """Convert an FP32 torch module to FP16 in place when its weights are on a CUDA device."""
+    if not HAS_TORCH or not isinstance(module, torch.nn.Module):
+        return
+
+    param = next(module.parameters(), None)
+    if param is not None and param.device.type == "cuda" and param.dtype == torch.float32:
+        module.half()
+
+
+def authenticate_huggingface() -> None:
+    """Log in to HuggingFace with the token from the environment."""
+    hf_token = os.getenv("HUGGINGFACE_HUB_TOKEN")
+    if not hf_token:
+        raise ValueError(
+            "HUGGINGFACE_HUB_TOKEN environment variable is required for MxBai reranker. "
+            "Please set it in your .env file or environment."
+        )
+
+    login(token=hf_token)
+
+
+def quantized_model_dir(model_path: str) -> Path:
+    """Return a directory holding an INT8 ONNX export of the model, creating it once."""
+    model_dir = QUANTIZED_MODEL_CACHE / f"{model_path.replace('/', '--')}-int8"
+    if (model_dir / QUANTIZED_MODEL_FILE).exists():
+        return model_dir
+
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    print(f"Exporting INT8 ONNX model for {model_path} to {model_dir}")
+
+    # Build the export beside the cache entry and rename it into place when complete
+    QUANTIZED_MODEL_CACHE.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=QUANTIZED_MODEL_CACHE))
+    try:
+        model = ORTModelForSequenceClassification.from_pretrained(model_path, export=True)
+        model.save_pretrained(tmp_dir)
+        AutoTokenizer.from_pretrained(model_path).save_pretrained(tmp_dir)
+
+        # Dynamic quantization: weights to INT8 ahead of time, activations at runtime
+        quantizer = ORTQuantizer.from_pretrained(tmp_dir)
+        quantizer.quantize(
+            save_dir=tmp_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        )
+
+        shutil.rmtree(model_dir, ignore_errors=True)
+        os.replace(tmp_dir, model_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return model_dir
+
+
+def _load_torch_cross_encoder(model_path: str) -> Any:
+    """Load a PyTorch CrossEncoder with fused scaled-dot-product attention where supported."""
+    try:
+        return CrossEncoder(model_path, model_kwargs={"attn_implementation": "sdpa"})
+    except (TypeError, ValueError):
+        # Older sentence-transformers without model_kwargs, or architectures without SDPA
+        return CrossEncoder(model_path)
+
+
+@functools.lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _load_cross_encoder(model_path: str, backend: str, quantize: bool, fp16: bool) -> Any:
+    """Load a CrossEncoder once per process for each combination of settings."""
+    configure_torch_threads()
+
+    # Quantization only exists on the ONNX path; never fall back to FP32 silently
+    if quantize and backend != "onnx":
+        raise ValueError("scorer_quantize requires scorer_backend 'onnx'")
+    if quantize and not HAS_ONNX:
+        raise ImportError("optimum and onnxruntime required for scorer_quantize")
+
+    try:
+        if backend == "onnx" and quantize:
+            model = CrossEncoder(
+                str(quantized_model_dir(model_path)),
+                backend="onnx",
+                model_kwargs={"file_name": QUANTIZED_MODEL_FILE, "provider": "CPUExecutionProvider"}
+            )
+        elif backend == "onnx" and HAS_ONNX:
+            try:
+                model = CrossEncoder(
+                    model_path,
+                    backend="onnx",
+                    model_kwargs={"provider": "CPUExecutionProvider"}
+                )
+            except TypeError:
+                # sentence-transformers releases without backend support
+                model = _load_torch_cross_encoder(model_path)
+        else:
+            model = _load_torch_cross_encoder(model_path)
+    except Exception as e:
+        raise ValueError(f"Failed to load cross-encoder model from {model_path}: {e}") from e
+
+    # No-op for ONNX models and CPU devices
+    if fp16:
+        half_on_cuda(getattr(model, "model", None))
+
+    return model
+
+
+@functools.lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _load_mxbai_reranker(model_path: str, fp16: bool) -> Any:
+    """Load an MxBai reranker once per process for each combination of settings."""
+    try:
+        model = MxbaiRerankV2(model_path)
+    except Exception as e:
+        raise ValueError(f"Failed to load MxBai model from {model_path}: {e}") from e
+
+    # Halve the underlying HF model when it was loaded in FP32 on a GPU
+    if fp16:
+        half_on_cuda(getattr(model, "model", None))
+
+    return model
+
+
+def get_cross_encoder(model_path: str, backend: str, quantize: bool, fp16: bool) -> Any:
+    """Return the process-wide CrossEncoder for these settings, loading it on first use."""
+    with _model_cache_lock:
+        return _load_cross_encoder(model_path, backend, quantize, fp16)
+
+
+def get_mxbai_reranker(model_path: str, fp16: bool) -> Any:
+    """Return the process-wide MxBai reranker for these settings, loading it on first use."""
+    with _model_cache_lock:
+        return _load_mxbai_reranker(model_path, fp16)
@@ -0,0 +1,138 @@
+"""Parallel parsing of ingested files across worker processes."""
+
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Sized
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import chain, islice
+from typing import ParamSpec, TypeVar
+
+from .cache import get_or_parse
+from .ingest import FileInfo
+from .parser import DocumentParser, ParsedDocument
+
+P = ParamSpec('P')
+T = TypeVar('T')
+
+# Below this many files, process startup outweighs parallel parsing
+PARALLEL_PARSE_MIN_FILES = 4
+
+# Per-process parser used by parse_documents' worker pool
+_worker_parser: DocumentParser | None = None
+
+
+def _parse_one(
+    file_info: FileInfo,
+    cache_dir: str | None = None,
+    ocr_workers: int | None = None
+) -> ParsedDocument | None:
+    """Parse a single file, returning None when no parser handles it."""
+    global _worker_parser
+    if _worker_parser is None or _worker_parser.ocr_workers != ocr_workers:
+        _worker_parser = DocumentParser(ocr_workers)
+
+    if not _worker_parser.can_parse(file_info):
+        return None
+
+    if cache_dir is not None:
+        doc = get_or_parse(file_info, _worker_parser, cache_dir)
+    else:
+        doc = _worker_parser.parse(file_info)
+
+    # Raw contents are no longer needed; don't ship them back from workers
+    doc.file_info.raw_bytes = None
+    return doc
+
+
+class _InlineExecutor(Executor):
+    """Executor that runs each call in the calling thread when it is submitted."""
+
+    def submit(self, fn: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs) -> Future[T]:
+        """Run the call now and return its outcome as a completed Future."""
+        future: Future[T] = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def parse_documents(
+    files: Iterable[FileInfo],
+    max_workers: int | None = None,
+    cache_dir: str | None = None
+) -> list[ParsedDocument]:
+    """Parse files in input order, fanning out to worker processes for larger corpora.
+
+    `files` may be a lazy stream (such as walk_directory), in which case parsing
+    starts as soon as the first files arrive rather than after the whole corpus is read.
+    """
+    docs: list[ParsedDocument] = []
+    workers = max_workers or os.cpu_count() or 1
+    if isinstance(files, Sized):
+        workers = min(workers, len(files))
+
+    # Look ahead far enough to decide whether a worker pool is worth starting
+    file_iter = iter(files)
+    head = list(islice(file_iter, PARALLEL_PARSE_MIN_FILES))
+    file_iter = chain(head, file_iter)
+
+    with ExitStack() as stack:
+        executor: Executor
+        ocr_workers: int | None = None
+        pooled = workers > 1 and len(head) >= PARALLEL_PARSE_MIN_FILES
+        if pooled:
+            # Spawn, not fork: the hashing threads feeding `files` may still be running,
+            # and forking a process with live threads can deadlock on their locks
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            )
+
+            # Each parse process runs its own OCR threads, so split the cores between
+            # them rather than letting every process start one thread per core
+            ocr_workers = max(1, (os.cpu_count() or 1) // workers)
+        else:
+            executor = _InlineExecutor()
+
+        # Bounded window of in-flight parses: keeps workers busy while capping
+        # how many files' contents are held in memory ahead of the consumer
+        max_pending = 2 * workers
+        pending: deque[tuple[FileInfo, Future[ParsedDocument | None]]] = deque()
+
+        for file_info in file_iter:
+            if pooled:
+                # Workers reread the file from its path; sending the contents would
+                # pickle every byte of it across the process boundary
+                file_info.raw_bytes = None
+            pending.append((file_info, executor.submit(_parse_one, file_info, cache_dir, ocr_workers)))
+            if len(pending) >= max_pending:
+                _collect_parse(*pending.popleft(), docs)
+
+        while pending:
+            _collect_parse(*pending.popleft(), docs)
+
+    return docs
+
+
+def _collect_parse(
+    file_info: FileInfo,
+    result: Future[ParsedDocument | None],
+    docs: list[ParsedDocument]
+) -> None:
+    """Wait for one parse, report it, and append the document to `docs`."""
+    try:
+        doc = result.result()
+    except Exception as e:
+        print(f"  Error parsing {file_info.relative_path}: {e}")
+        return
+    finally:
+        # Release file contents captured during ingestion
+        file_info.raw_bytes = None
+
+    if doc is None:
+        print(f"  Skipped {file_info.relative_path} (no parser)")
+    else:
+        docs.append(doc)
+        print(f"  Parsed {file_info.relative_path} ({len(doc.text)} chars)")
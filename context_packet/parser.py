@@ -1,46 +1,51 @@
 """Text parsers for different file formats."""
 
+import contextlib
 import io
+import os
 import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+from pathlib import Path
 from typing import Any, Protocol
 
-from pydantic import BaseModel
+from .ingest import FileInfo
 
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except ImportError:
-    HAS_BS4 = False
+# Optional parsing backends are imported on first use; probing for them here
+# keeps PDF, HTML and OCR libraries out of startup for corpora that don't need them
+HAS_LXML = find_spec('lxml') is not None
+HAS_SELECTOLAX = find_spec('selectolax') is not None
+HAS_BS4 = find_spec('bs4') is not None
+HAS_PYMUPDF = find_spec('fitz') is not None
+HAS_OCR = find_spec('pytesseract') is not None and find_spec('PIL') is not None
 
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
+# Bytes fed to the incremental HTML parser per call
+HTML_FEED_SIZE = 64 * 1024
 
-try:
-    import pytesseract
-    from PIL import Image
-    HAS_OCR = True
-except ImportError:
-    HAS_OCR = False
+# Whitespace normalization patterns, compiled once
+_RE_WS = re.compile(r'\s+')
+_RE_BLANKLINES = re.compile(r'\n\s*\n\s*\n+')
 
-from .ingest import FileInfo
 
-
-class ParsedDocument(BaseModel):
+@dataclass(slots=True)
+class ParsedDocument:
     """Parsed document with extracted text."""
 
     file_info: FileInfo
     text: str
     media_type: str  # 'text', 'html', 'pdf'
     page_count: int = 1
-    metadata: dict[str, str] = {}
+    metadata: dict[str, str] = field(default_factory=dict)
 
 
 class Parser(Protocol):
     """Protocol for file parsers."""
 
+    SUPPORTED_EXTENSIONS: set[str]
+
     def can_parse(self, file_info: FileInfo) -> bool:
         """Check if this parser can handle the file."""
         ...
@@ -49,6 +54,10 @@ class Parser(Protocol):
         """Parse the file and return extracted text."""
         ...
 
+    def backend(self, file_info: FileInfo) -> str:
+        """Name the extraction backend and settings, so cached parses track changes to them."""
+        ...
+
 
 class PlaintextParser:
     """Parser for plain text files."""
@@ -59,19 +68,29 @@ class PlaintextParser:
         """Check if file is plain text."""
         return file_info.extension in self.SUPPORTED_EXTENSIONS
 
+    def backend(self, file_info: FileInfo) -> str:
+        """Plain text is decoded directly."""
+        return "plaintext"
+
     def parse(self, file_info: FileInfo) -> ParsedDocument:
         """Parse plain text file."""
-        try:
-            with open(file_info.path, encoding='utf-8') as f:
-                text = f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            with open(file_info.path, encoding='latin-1') as f:
-                text = f.read()
+        if file_info.raw_bytes is not None:
+            # Contents were already read during ingestion
+            try:
+                text = file_info.raw_bytes.decode('utf-8')
+            except UnicodeDecodeError:
+                text = file_info.raw_bytes.decode('latin-1')
+        else:
+            try:
+                with open(file_info.path, encoding='utf-8') as f:
+                    text = f.read()
+            except UnicodeDecodeError:
+                # Try with different encoding
+                with open(file_info.path, encoding='latin-1') as f:
+                    text = f.read()
 
         # Normalize whitespace but preserve paragraph breaks
-        text = re.sub(r'\r\n', '\n', text)
-        text = re.sub(r'\r', '\n', text)
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
 
         return ParsedDocument(
             file_info=file_info,
@@ -88,15 +107,82 @@ class HTMLParser:
 
     def can_parse(self, file_info: FileInfo) -> bool:
         """Check if file is HTML."""
-        return file_info.extension in self.SUPPORTED_EXTENSIONS and HAS_BS4
+        return file_info.extension in self.SUPPORTED_EXTENSIONS and (HAS_LXML or HAS_SELECTOLAX or HAS_BS4)
+
+    def backend(self, file_info: FileInfo) -> str:
+        """Prefer lxml parser events, which never build a DOM, then the C-backed lexbor parser, then bs4."""
+        if HAS_LXML:
+            return "lxml"
+        if HAS_SELECTOLAX:
+            return "lexbor"
+        return "bs4"
 
     def parse(self, file_info: FileInfo) -> ParsedDocument:
         """Parse HTML file and extract text."""
-        if not HAS_BS4:
-            raise ImportError("BeautifulSoup4 required for HTML parsing")
+        if not (HAS_LXML or HAS_SELECTOLAX or HAS_BS4):
+            raise ImportError("lxml, selectolax or BeautifulSoup4 required for HTML parsing")
+
+        backend = self.backend(file_info)
+        if backend == "lxml":
+            # Fed in blocks, so the document is never held as one decoded string
+            text, title = self._extract_lxml(_read_blocks(file_info))
+        else:
+            if file_info.raw_bytes is not None:
+                html_content = file_info.raw_bytes.decode('utf-8')
+            else:
+                with open(file_info.path, encoding='utf-8') as f:
+                    html_content = f.read()
+
+            if backend == "lexbor":
+                text, title = self._extract_lexbor(html_content)
+            else:
+                text, title = self._extract_bs4(html_content)
+
+        # Normalize whitespace
+        text = _RE_WS.sub(' ', text)
+        text = _RE_BLANKLINES.sub('\n\n', text)
+
+        return ParsedDocument(
+            file_info=file_info,
+            text=text.strip(),
+            media_type='html',
+            page_count=1,
+            metadata={'title': title}
+        )
+
+    def _extract_lxml(self, blocks: Iterable[bytes]) -> tuple[str, str]:
+        """Extract document text and title from UTF-8 blocks fed through lxml's parser events."""
+        from lxml import etree
+
+        target = _HTMLTextTarget()
+        parser = etree.HTMLParser(target=target, recover=True, encoding='utf-8')
+
+        for block in blocks:
+            parser.feed(block)
 
-        with open(file_info.path, encoding='utf-8') as f:
-            html_content = f.read()
+        # Raised for input with no elements at all, such as an empty file
+        with contextlib.suppress(etree.XMLSyntaxError):
+            parser.close()
+
+        return target.close()
+
+    def _extract_lexbor(self, html_content: str) -> tuple[str, str]:
+        """Extract document text and title using selectolax's lexbor backend."""
+        from selectolax.lexbor import LexborHTMLParser
+
+        tree = LexborHTMLParser(html_content)
+
+        # Remove script and style elements
+        for node in tree.css('script, style'):
+            node.decompose()
+
+        title = tree.css_first('title')
+
+        return tree.text(), title.text().strip() if title else ''
+
+    def _extract_bs4(self, html_content: str) -> tuple[str, str]:
+        """Extract document text and title using BeautifulSoup."""
+        from bs4 import BeautifulSoup
 
         soup = BeautifulSoup(html_content, 'html.parser')
 
@@ -104,38 +190,69 @@ class HTMLParser:
         for script in soup(["script", "style"]):
             script.decompose()
 
-        # Extract text with some structure preservation
-        text_parts = []
-
-        # Get title if available
         title = soup.find('title')
-        if title:
-            text_parts.append(f"# {title.get_text().strip()}\n")
 
-        # Process body content
-        body = soup.find('body') or soup
+        return soup.get_text(), title.get_text().strip() if title else ''
 
-        if hasattr(body, 'find_all'):
-            for element in body.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                if element.name:
-                    level = int(element.name[1])
-                    prefix = '#' * level
-                    text_parts.append(f"\n{prefix} {element.get_text().strip()}\n")
 
-        # Get all text and clean it up
-        text = soup.get_text()
+def _read_blocks(file_info: FileInfo) -> Iterator[bytes]:
+    """Yield a file's contents in HTML_FEED_SIZE blocks, from memory when ingestion captured them."""
+    if file_info.raw_bytes is not None:
+        data = memoryview(file_info.raw_bytes)
+        for start in range(0, len(data), HTML_FEED_SIZE):
+            yield bytes(data[start:start + HTML_FEED_SIZE])
+        return
 
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    with open(file_info.path, 'rb') as f:
+        yield from iter(lambda: f.read(HTML_FEED_SIZE), b'')
 
-        return ParsedDocument(
-            file_info=file_info,
-            text=text.strip(),
-            media_type='html',
-            page_count=1,
-            metadata={'title': title.get_text().strip() if title else ''}
-        )
+
+class _HTMLTextTarget:
+    """lxml parser target that collects text outside script and style elements."""
+
+    SKIP_TAGS = {'script', 'style'}
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self.title_parts: list[str] = []
+        self.skip_depth = 0
+        self.in_title = False
+        self.seen_title = False
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        """Track entry into skipped elements and the first title."""
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == 'title' and not self.seen_title:
+            self.in_title = True
+
+    def end(self, tag: str) -> None:
+        """Track exit from skipped elements and the title."""
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == 'title' and self.in_title:
+            self.in_title = False
+            self.seen_title = True
+
+    def data(self, data: str) -> None:
+        """Collect a text segment."""
+        if self.skip_depth:
+            return
+
+        self.parts.append(data)
+        if self.in_title:
+            self.title_parts.append(data)
+
+    def close(self) -> tuple[str, str]:
+        """Return the document text and title."""
+        return ''.join(self.parts), ''.join(self.title_parts).strip()
+
+
+def _pdf_text_flags() -> int:
+    """PyMuPDF get_text flags used for PDF extraction."""
+    import fitz  # PyMuPDF
+
+    return int(fitz.TEXTFLAGS_TEXT | fitz.TEXT_DEHYPHENATE)
 
 
 class PDFParser:
@@ -143,63 +260,107 @@ class PDFParser:
 
     SUPPORTED_EXTENSIONS = {'pdf'}
 
+    def __init__(self, ocr_workers: int | None = None) -> None:
+        """`ocr_workers` threads run tesseract on sparse pages (default: CPU count)."""
+        self.ocr_workers = max(1, ocr_workers or os.cpu_count() or 1)
+
     def can_parse(self, file_info: FileInfo) -> bool:
         """Check if file is PDF."""
         return file_info.extension in self.SUPPORTED_EXTENSIONS and HAS_PYMUPDF
 
+    def backend(self, file_info: FileInfo) -> str:
+        """PyMuPDF version and text flags, plus whether sparse pages are OCR'd."""
+        import fitz  # PyMuPDF
+
+        return f"pymupdf-{fitz.VersionBind}-flags{_pdf_text_flags()}" + ("-ocr" if HAS_OCR else "")
+
     def parse(self, file_info: FileInfo) -> ParsedDocument:
         """Parse PDF file and extract text."""
         if not HAS_PYMUPDF:
             raise ImportError("PyMuPDF required for PDF parsing")
 
-        text_parts = []
+        import fitz  # PyMuPDF
+
+        text_parts: list[str] = []
         page_count = 0
 
         try:
             doc = fitz.open(file_info.path)
             page_count = len(doc)
-
-            for page_num in range(page_count):
-                page = doc.load_page(page_num)
-
-                # Try text extraction first
-                page_text = page.get_text()
-
-                # If no text or very little text, try OCR fallback
-                if len(page_text.strip()) < 50 and HAS_OCR:
-                    page_text = self._ocr_page(page)
-
-                if page_text.strip():
-                    text_parts.append(page_text.strip())
+            text_flags = _pdf_text_flags()
+
+            # PyMuPDF isn't thread-safe, so pages are extracted and rendered here;
+            # only the OCR itself (tesseract runs out of process) goes to threads
+            with ThreadPoolExecutor(max_workers=max(1, min(page_count, self.ocr_workers))) as executor:
+                # Pages in order, with OCR'd ones still pending; the number of OCR
+                # futures is capped so rendered page images don't pile up in memory
+                pending: deque[str | Future[str]] = deque()
+                max_ocr_pending = 2 * self.ocr_workers
+                ocr_pending = 0
+
+                for page_num in range(page_count):
+                    page = doc.load_page(page_num)
+
+                    # Try text extraction first, joining words hyphenated across lines
+                    page_text = page.get_text("text", flags=text_flags)
+
+                    # If no text or very little text, try OCR fallback
+                    if len(page_text.strip()) < 50 and HAS_OCR:
+                        while ocr_pending >= max_ocr_pending:
+                            if isinstance(pending[0], Future):
+                                ocr_pending -= 1
+                            self._collect_page(pending.popleft(), text_parts)
+
+                        img_data = self._render_page(page)
+                        pending.append(executor.submit(self._ocr_image, img_data))
+                        ocr_pending += 1
+                    else:
+                        pending.append(page_text)
+
+                while pending:
+                    self._collect_page(pending.popleft(), text_parts)
 
             doc.close()
 
         except Exception as e:
             raise ValueError(f"Failed to parse PDF {file_info.path}: {e}") from e
 
-        # Join pages with double newlines
-        full_text = '\n\n'.join(text_parts)
-
-        # Clean up whitespace
-        full_text = re.sub(r'\s+', ' ', full_text)
-        full_text = re.sub(r'\n\s*\n\s*\n+', '\n\n', full_text)
+        # Join pages and collapse all whitespace runs to single spaces in one pass
+        full_text = ' '.join('\n\n'.join(text_parts).split())
 
         return ParsedDocument(
             file_info=file_info,
-            text=full_text.strip(),
+            text=full_text,
             media_type='pdf',
             page_count=page_count
         )
 
-    def _ocr_page(self, page: Any) -> str:
-        """Perform OCR on a PDF page."""
+    def _collect_page(self, result: str | Future[str], text_parts: list[str]) -> None:
+        """Append a page's text to `text_parts`, waiting for its OCR if needed."""
+        page_text = result.result() if isinstance(result, Future) else result
+        if page_text.strip():
+            text_parts.append(page_text.strip())
+
+    def _render_page(self, page: Any) -> bytes:
+        """Render a PDF page to PPM image bytes for OCR."""
         if not HAS_OCR:
-            return ""
+            return b""
 
         try:
-            # Render page to image
             pix = page.get_pixmap()
-            img_data = pix.tobytes("ppm")
+            return bytes(pix.tobytes("ppm"))
+
+        except Exception:
+            return b""
+
+    def _ocr_image(self, img_data: bytes) -> str:
+        """Run OCR on rendered page image bytes."""
+        if not HAS_OCR or not img_data:
+            return ""
+
+        try:
+            import pytesseract
+            from PIL import Image
 
             # Convert to PIL Image and run OCR
             img = Image.open(io.BytesIO(img_data))
@@ -214,21 +375,40 @@ class PDFParser:
 class DocumentParser:
     """Main document parser that delegates to format-specific parsers."""
 
-    def __init__(self) -> None:
+    def __init__(self, ocr_workers: int | None = None) -> None:
+        self.ocr_workers = ocr_workers
         self.parsers: list[Parser] = [
             PlaintextParser(),
             HTMLParser(),
-            PDFParser(),
+            PDFParser(ocr_workers),
         ]
 
+        # Extension -> first parser able to handle it, resolved once so dispatch
+        # doesn't re-check every parser and backend availability per file
+        self._by_ext: dict[str, Parser] = {}
+        for parser in self.parsers:
+            for ext in parser.SUPPORTED_EXTENSIONS:
+                probe = FileInfo(path=Path(), content_hash='', size=0, extension=ext, relative_path='')
+                if ext not in self._by_ext and parser.can_parse(probe):
+                    self._by_ext[ext] = parser
+
     def parse(self, file_info: FileInfo) -> ParsedDocument:
         """Parse document using appropriate parser."""
-        for parser in self.parsers:
-            if parser.can_parse(file_info):
-                return parser.parse(file_info)
+        parser = self._by_ext.get(file_info.extension)
+        if parser is None:
+            raise ValueError(f"No parser available for file: {file_info.path}")
+
+        return parser.parse(file_info)
 
-        raise ValueError(f"No parser available for file: {file_info.path}")
+    def backend(self, file_info: FileInfo) -> str:
+        """Backend of the parser that handles this file."""
+        parser = self._by_ext.get(file_info.extension)
+        if parser is None:
+            raise ValueError(f"No parser available for file: {file_info.path}")
+
+        return parser.backend(file_info)
 
     def can_parse(self, file_info: FileInfo) -> bool:
         """Check if any parser can handle this file."""
-        return any(parser.can_parse(file_info) for parser in self.parsers)
+        return file_info.extension in self._by_ext
+
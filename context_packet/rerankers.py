@@ -0,0 +1,341 @@
+"""Model-backed scorers: sentence-transformers cross-encoders and MxBai rerankers."""
+
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from .chunker import Chunk
+from .models import (
+    HAS_MXBAI,
+    HAS_SENTENCE_TRANSFORMERS,
+    HAS_TORCH,
+    authenticate_huggingface,
+    configure_torch_threads,
+    get_cross_encoder,
+    get_mxbai_reranker,
+    inference_mode,
+)
+
+if HAS_TORCH:
+    import torch
+
+# Below this many cores, a CPU worker pool isn't worth a model copy per process
+MXBAI_POOL_MIN_CORES = 4
+
+
+@dataclass(slots=True)
+class _PairTemplate:
+    """Token layout of a query-chunk pair for one query, with the chunk left out."""
+
+    query: str
+    prefix_ids: np.ndarray  # Special tokens and query tokens ahead of the chunk
+    prefix_type_ids: np.ndarray
+    chunk_type_id: int
+    suffix_ids: np.ndarray  # Special tokens after the chunk
+    suffix_type_ids: np.ndarray
+    budget: int  # Most chunk tokens that fit in the pair
+
+
+class CrossEncoderScorer:
+    """Cross-encoder based scorer using sentence-transformers."""
+
+    def __init__(
+        self,
+        model_path: str,
+        batch_size: int = 32,
+        backend: str = "onnx",
+        quantize: bool = False,
+        fp16: bool = True,
+        token_cache_size: int = 0
+    ):
+        """Initialize cross-encoder scorer; `token_cache_size` > 0 keeps chunk tokens for later queries."""
+        if not HAS_SENTENCE_TRANSFORMERS:
+            raise ImportError("sentence-transformers required for CrossEncoderScorer")
+
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.backend = backend
+        self.quantize = quantize
+        self.fp16 = fp16
+        self.model = None
+
+        # Chunk id -> token ids (no special tokens), reused across queries; least recently used evicted
+        self.token_cache_size = token_cache_size
+        self.token_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._pair_template: _PairTemplate | None = None
+        self._backend: Any = None
+
+    def _load_model(self) -> None:
+        """Lazy load the model, sharing it with other scorers using the same settings."""
+        if self.model is None:
+            self.model = get_cross_encoder(self.model_path, self.backend, self.quantize, self.fp16)
+
+    def _tokenize_chunks(self, chunks: list[Chunk]) -> list[np.ndarray]:
+        """Return each chunk's token ids, tokenizing only chunks not in the cache."""
+        cache = self.token_cache
+        chunk_ids = [cache.get(chunk.id) for chunk in chunks]
+        missing = [i for i, ids in enumerate(chunk_ids) if ids is None]
+
+        if missing:
+            backend = self._backend_tokenizer()
+            max_length = self._max_length()
+            encodings = backend.encode_batch([chunks[i].text for i in missing], add_special_tokens=False)
+            for i, encoding in zip(missing, encodings, strict=True):
+                chunk_ids[i] = np.array(encoding.ids[:max_length], dtype=np.int32)
+
+        if self.token_cache_size > 0:
+            for chunk, ids in zip(chunks, chunk_ids, strict=True):
+                cache[chunk.id] = ids  # type: ignore[assignment]
+                cache.move_to_end(chunk.id)
+            while len(cache) > self.token_cache_size:
+                cache.popitem(last=False)
+
+        return chunk_ids  # type: ignore[return-value]
+
+    def _backend_tokenizer(self) -> Any:
+        """The fast tokenizer's backend, copied so no padding or truncation settings carry over."""
+        if self._backend is None:
+            from tokenizers import Tokenizer
+
+            # Calling the HF tokenizer leaves its padding and truncation enabled on the shared backend
+            self._backend = Tokenizer.from_str(self.model.tokenizer.backend_tokenizer.to_str())  # type: ignore
+            self._backend.no_padding()
+            self._backend.no_truncation()
+
+        return self._backend
+
+    def _max_length(self) -> int:
+        """Maximum sequence length of a query-chunk pair."""
+        model = self.model
+        # sentence-transformers 5 renamed max_length to max_seq_length
+        max_length = getattr(model, "max_seq_length", None) or getattr(model, "max_length", None)
+        return int(max_length or model.tokenizer.model_max_length)  # type: ignore
+
+    def encode(self, query: str, chunks: list[Chunk]) -> Any:
+        """Build a padded model input batch, reusing cached chunk tokens when possible."""
+        self._load_model()
+        inputs = self._encode(query, chunks)
+
+        # Page-locked host memory lets the copy to the GPU overlap with compute
+        if HAS_TORCH and torch.device(getattr(self.model, "device", "cpu")).type == "cuda":
+            inputs = {name: tensor.pin_memory() for name, tensor in inputs.items()}
+
+        return inputs
+
+    def _template(self, query: str) -> "_PairTemplate | None":
+        """Special-token layout around the chunk for `query`, or None when pairs need the tokenizer."""
+        if self._pair_template is not None and self._pair_template.query == query:
+            return self._pair_template
+
+        tokenizer = self.model.tokenizer  # type: ignore
+        if not tokenizer.is_fast:
+            # Slow tokenizers expose no backend to assemble pairs with
+            return None
+
+        # Post-process the query with a placeholder chunk to find where chunk tokens go
+        backend = self._backend_tokenizer()
+        query_encoding = backend.encode(query, add_special_tokens=False)
+        placeholder = backend.encode("a", add_special_tokens=False)
+        pair = backend.post_process(query_encoding, placeholder, add_special_tokens=True)
+        second = [i for i, seq in enumerate(pair.sequence_ids) if seq == 1]
+        if not second:
+            return None
+
+        ids = np.array(pair.ids, dtype=np.int64)
+        type_ids = np.array(pair.type_ids, dtype=np.int64)
+        start, end = second[0], second[-1] + 1
+        n_query = len(query_encoding.ids)
+        n_special = len(ids) - (end - start) - n_query
+
+        # Cutting only the chunk matches longest_first truncation while the query
+        # fits in half the pair; longer queries must be truncated as well
+        room = self._max_length() - n_special
+        if 2 * n_query > room:
+            return None
+
+        self._pair_template = _PairTemplate(
+            query=query,
+            prefix_ids=ids[:start],
+            prefix_type_ids=type_ids[:start],
+            chunk_type_id=int(type_ids[start]),
+            suffix_ids=ids[end:],
+            suffix_type_ids=type_ids[end:],
+            budget=room - n_query
+        )
+        return self._pair_template
+
+    def _encode(self, query: str, chunks: list[Chunk]) -> Any:
+        """Tokenize a batch of query-chunk pairs into padded tensors."""
+        tokenizer = self.model.tokenizer  # type: ignore
+        template = self._template(query)
+
+        if template is None:
+            # Let the tokenizer truncate query and chunk together, as CrossEncoder.predict does
+            return tokenizer(
+                [query] * len(chunks),
+                [chunk.text for chunk in chunks],
+                padding=True,
+                truncation=True,
+                max_length=self._max_length(),
+                return_tensors="pt"
+            )
+
+        chunk_ids = [ids[:template.budget] for ids in self._tokenize_chunks(chunks)]
+        n_fixed = len(template.prefix_ids) + len(template.suffix_ids)
+        width = n_fixed + max(len(ids) for ids in chunk_ids)
+
+        input_ids = np.full((len(chunks), width), tokenizer.pad_token_id, dtype=np.int64)
+        token_type_ids = np.full((len(chunks), width), tokenizer.pad_token_type_id, dtype=np.int64)
+        attention_mask = np.zeros((len(chunks), width), dtype=np.int64)
+
+        # Lay out [prefix | chunk | suffix] in each row, padded on the tokenizer's side
+        for row, ids in enumerate(chunk_ids):
+            length = n_fixed + len(ids)
+            start = width - length if tokenizer.padding_side == "left" else 0
+            stop = start + length
+            input_ids[row, start:stop] = np.concatenate((template.prefix_ids, ids, template.suffix_ids))
+            token_type_ids[row, start:stop] = np.concatenate((
+                template.prefix_type_ids,
+                np.full(len(ids), template.chunk_type_id, dtype=np.int64),
+                template.suffix_type_ids
+            ))
+            attention_mask[row, start:stop] = 1
+
+        features = {"input_ids": input_ids, "token_type_ids": token_type_ids, "attention_mask": attention_mask}
+        return {name: torch.from_numpy(features[name]) for name in tokenizer.model_input_names}
+
+    def _forward(self, inputs: Any) -> np.ndarray:
+        """Run the underlying model and return one raw logit per pair."""
+        device = getattr(self.model, "device", "cpu")
+        inputs = {name: tensor.to(device, non_blocking=True) for name, tensor in inputs.items()}
+
+        with inference_mode():
+            logits = self.model.model(**inputs).logits  # type: ignore
+
+        return np.asarray(logits.reshape(len(logits), -1)[:, 0].float().cpu().numpy(), dtype=np.float64)
+
+    def score_batch(self, query: str, chunks: list[Chunk]) -> np.ndarray:
+        """Score chunks using cross-encoder model."""
+        if not chunks:
+            return np.empty(0)
+
+        return self.score_encoded(self.encode(query, chunks))
+
+    def score_encoded(self, inputs: Any) -> np.ndarray:
+        """Score a batch prepared by encode()."""
+        # Get raw logits from model, need to convert to [0,1]
+        raw = self._forward(inputs)
+
+        # Convert to probabilities using sigmoid, vectorized over the batch
+        return np.asarray(1.0 / (1.0 + np.exp(-raw)), dtype=np.float64)
+
+
+def _rank_scores(model: Any, query: str, documents: list[str]) -> np.ndarray:
+    """Score documents with an MxBai reranker, returned in input order."""
+    with inference_mode():
+        results = model.rank(query, documents, top_k=len(documents), sort=False, return_documents=False)
+
+    # Place each RankResult by its index; rank() doesn't promise input order
+    scores = np.zeros(len(documents))
+    for result in results:
+        scores[result.index] = result.score
+
+    return scores
+
+
+# Per-process reranker used by MxbaiScorer's CPU worker pool
+_worker_reranker: Any = None
+
+
+def _init_mxbai_worker(model_path: str, num_threads: int) -> None:
+    """Load the reranker once in each worker process, splitting cores between workers."""
+    global _worker_reranker
+    if HAS_TORCH:
+        torch.set_num_threads(num_threads)
+    _worker_reranker = get_mxbai_reranker(model_path, fp16=False)
+
+
+def _rank_shard(query: str, documents: list[str]) -> np.ndarray:
+    """Score one shard of a batch inside a worker process."""
+    return _rank_scores(_worker_reranker, query, documents)
+
+
+class MxbaiScorer:
+    """MxBai reranker based scorer."""
+
+    def __init__(
+        self,
+        model_path: str = "mixedbread-ai/mxbai-rerank-base-v2",
+        fp16: bool = True,
+        num_workers: int = 1
+    ):
+        """Initialize MxBai reranker; on CPU-only hosts, `num_workers` > 1 scores in worker processes."""
+        if not HAS_MXBAI:
+            raise ImportError("mxbai-rerank required for MxbaiScorer")
+
+        self.model_path = model_path
+        self.fp16 = fp16
+        self.num_workers = num_workers
+        self.model = None
+        self.pool: ProcessPoolExecutor | None = None
+
+    def _load_model(self) -> None:
+        """Lazy load the model."""
+        if self.model is None and self.pool is None:
+            configure_torch_threads()
+
+            # Ensure HuggingFace token is available and authenticate
+            authenticate_huggingface()
+
+            cpu_count = os.cpu_count() or 1
+            on_gpu = HAS_TORCH and torch.cuda.is_available()
+            if self.num_workers > 1 and cpu_count >= MXBAI_POOL_MIN_CORES and not on_gpu:
+                # Each worker holds its own model copy, sidestepping the GIL on CPU-only hosts
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_mxbai_worker,
+                    initargs=(self.model_path, max(1, cpu_count // self.num_workers))
+                )
+                print(f"✓ Scoring with {self.num_workers} MxBai reranker processes: {self.model_path}")
+                return
+
+            self.model = get_mxbai_reranker(self.model_path, self.fp16)
+            print(f"✓ Loaded MxBai reranker: {self.model_path}")
+
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self) -> "MxbaiScorer":
+        """Return the scorer; the worker pool starts on first use."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Shut down the worker pool."""
+        self.close()
+
+    def score_batch(self, query: str, chunks: list[Chunk]) -> np.ndarray:
+        """Score chunks using MxBai reranker."""
+        self._load_model()
+
+        if not chunks:
+            return np.empty(0)
+
+        # Prepare documents for MxBai
+        documents = [chunk.text for chunk in chunks]
+
+        if self.pool is None:
+            return _rank_scores(self.model, query, documents)
+
+        # Split the batch evenly across workers; map preserves shard order
+        shard_size = -(-len(documents) // self.num_workers)
+        shards = [documents[i:i + shard_size] for i in range(0, len(documents), shard_size)]
+        return np.concatenate(list(self.pool.map(_rank_shard, [query] * len(shards), shards)))
@@ -0,0 +1,97 @@
+"""Top-K retrieval: a BM25 prefilter ahead of early-stopping cross-encoder scoring."""
+
+import heapq
+import re
+from collections import Counter
+from contextlib import closing
+
+import numpy as np
+
+from .chunker import Chunk
+from .scorer import ChunkScorer, ScoredChunk
+
+# score_top_k stops after this many consecutive batches add nothing to the top K
+TOP_K_PATIENCE = 2
+
+# Word pattern for the BM25 prefilter
+_RE_WORD = re.compile(r'\w+')
+
+
+def bm25_scores(query: str, texts: list[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """Okapi BM25 score of each text for the query's words."""
+    query_terms = set(_RE_WORD.findall(query.lower()))
+    if not texts or not query_terms:
+        return np.zeros(len(texts))
+
+    # Term frequencies restricted to query terms, plus document lengths
+    doc_lengths = np.empty(len(texts))
+    term_freqs = {term: np.zeros(len(texts)) for term in query_terms}
+    for i, text in enumerate(texts):
+        words = _RE_WORD.findall(text.lower())
+        doc_lengths[i] = len(words)
+        for term, count in Counter(word for word in words if word in query_terms).items():
+            term_freqs[term][i] = count
+
+    length_norm = k1 * (1 - b + b * doc_lengths / max(doc_lengths.mean(), 1.0))
+    scores = np.zeros(len(texts))
+    for tf in term_freqs.values():
+        doc_freq = np.count_nonzero(tf)
+        idf = np.log(1 + (len(texts) - doc_freq + 0.5) / (doc_freq + 0.5))
+        scores += idf * tf * (k1 + 1) / (tf + length_norm)
+
+    return scores
+
+
+def score_top_k(
+    chunk_scorer: ChunkScorer,
+    query: str,
+    chunks: list[Chunk],
+    k: int,
+    patience: int = TOP_K_PATIENCE,
+    include_text: bool = False
+) -> list[ScoredChunk]:
+    """Return the k best-scoring chunks, best first, scoring as few chunks as practical.
+
+    Chunks are scored in descending BM25 order, and scoring stops once `patience`
+    consecutive batches have failed to displace anything from the current top k.
+    This trades recall for speed: a relevant chunk sharing no words with the query
+    sorts late and can be missed. When BM25 gives no ordering at all (every score
+    equal, e.g. no query word appears anywhere), every chunk is scored.
+
+    Batches go through ChunkScorer's batching, so `token_budget` and tokenization
+    prefetch apply as they do for score_chunks; only the length sort is replaced by BM25 order.
+    """
+    if not chunks or k <= 0:
+        return []
+
+    lexical = bm25_scores(query, [chunk.text for chunk in chunks])
+    candidates = np.argsort(-lexical, kind='stable').tolist()
+
+    # Without a lexical signal the candidates are in input order, so stopping early would be arbitrary
+    early_stop = bool(lexical.max() > lexical.min())
+
+    # Min-heap of (score, index) holding the best k seen so far
+    heap: list[tuple[float, int]] = []
+    stale_batches = 0
+
+    # Closing the batch stream on an early stop also winds down its prefetch thread
+    with closing(chunk_scorer._score_batches(query, chunks, order=candidates)) as batches:
+        for idx_batch, batch_scores in batches:
+            improved = False
+            for i, score in zip(idx_batch, batch_scores.tolist(), strict=False):
+                if len(heap) < k:
+                    heapq.heappush(heap, (score, i))
+                    improved = True
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, i))
+                    improved = True
+
+            stale_batches = 0 if improved else stale_batches + 1
+            if early_stop and stale_batches >= patience:
+                break
+
+    scored_chunks = []
+    for score, i in sorted(heap, reverse=True):
+        scored_chunks.append(ScoredChunk.from_chunk(chunks[i], score, include_text))
+
+    return scored_chunks
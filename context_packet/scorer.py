@@ -1,54 +1,73 @@
 """Cross-encoder scoring for chunk relevance."""
 
-import json
-import os
-from collections.abc import Iterator
+import zlib
+from collections.abc import Generator, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Protocol
-
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    HAS_DOTENV = True
-except ImportError:
-    HAS_DOTENV = False
-
-try:
-    from sentence_transformers import CrossEncoder
-    HAS_SENTENCE_TRANSFORMERS = True
-except ImportError:
-    HAS_SENTENCE_TRANSFORMERS = False
-
-try:
-    from mxbai_rerank import MxbaiRerankV2
-    from huggingface_hub import login
-    HAS_MXBAI = True
-except ImportError:
-    HAS_MXBAI = False
-
-from .chunker import Chunk
+from typing import IO, Any, Protocol, runtime_checkable
+
+import numpy as np
+import orjson
+
+from .chunker import Chunk, ChunkTable, count_tokens
 from .config import Config
+from .models import HAS_MXBAI, HAS_SENTENCE_TRANSFORMERS
+from .rerankers import CrossEncoderScorer, MxbaiScorer
+from .writer import WRITE_BUFFER_SIZE
+
+# Special tokens a cross-encoder adds around each (query, chunk) pair, e.g. <s> q </s></s> c </s>
+PAIR_SPECIAL_TOKENS = 4
 
+# score_chunks_streaming length-sorts within windows of this many batches, then
+# yields each window in input order
+STREAM_WINDOW_BATCHES = 8
 
-@dataclass
+
+@dataclass(slots=True)
 class ScoredChunk:
     """A chunk with its relevance score."""
 
     id: str
     doc_id: str
     order: int
-    text: str
     tokens: int
     citation: str
     score: float
+    text: str | None = None  # Only carried when requested; look up the Chunk by id otherwise
+
+    @classmethod
+    def from_chunk(cls, chunk: Chunk, score: float, include_text: bool = False) -> "ScoredChunk":
+        """Attach a score to a chunk, copying its text only when asked."""
+        return cls(
+            id=chunk.id,
+            doc_id=chunk.doc_id,
+            order=chunk.order,
+            tokens=chunk.tokens,
+            citation=chunk.citation,
+            score=score,
+            text=chunk.text if include_text else None
+        )
 
 
 class Scorer(Protocol):
     """Protocol for chunk scoring models."""
 
-    def score_batch(self, query: str, chunks: list[Chunk]) -> list[float]:
-        """Score a batch of chunks against a query."""
+    def score_batch(self, query: str, chunks: list[Chunk]) -> np.ndarray | Sequence[float]:
+        """Score a batch of chunks against a query, one score per chunk in chunk order."""
+        ...
+
+
+@runtime_checkable
+class PrefetchScorer(Scorer, Protocol):
+    """Scorer whose input preparation can run ahead of model inference."""
+
+    def encode(self, query: str, chunks: list[Chunk]) -> Any:
+        """Prepare model inputs for a batch."""
+        ...
+
+    def score_encoded(self, inputs: Any) -> np.ndarray | Sequence[float]:
+        """Score a batch prepared by encode()."""
         ...
 
 
@@ -59,107 +78,15 @@ class MockScorer:
         """Initialize with seed for deterministic scores."""
         self.seed = seed
 
-    def score_batch(self, query: str, chunks: list[Chunk]) -> list[float]:
+    def score_batch(self, query: str, chunks: list[Chunk]) -> np.ndarray:
         """Return deterministic pseudo-random scores based on chunk content."""
-        scores = []
-        for chunk in chunks:
-            # Simple hash-based scoring that's deterministic
-            # Use a more stable hash approach
-            hash_input = f"{query}|{chunk.id}|{chunk.citation}"
-            content_hash = abs(hash(hash_input))
-            score = (content_hash % 1000) / 1000.0 * 0.8 + 0.1  # Range 0.1-0.9
-            scores.append(score)
-        return scores
-
-
-class CrossEncoderScorer:
-    """Cross-encoder based scorer using sentence-transformers."""
-
-    def __init__(self, model_path: str, batch_size: int = 32):
-        """Initialize cross-encoder scorer."""
-        if not HAS_SENTENCE_TRANSFORMERS:
-            raise ImportError("sentence-transformers required for CrossEncoderScorer")
-
-        self.model_path = model_path
-        self.batch_size = batch_size
-        self.model = None
-
-    def _load_model(self) -> None:
-        """Lazy load the model."""
-        if self.model is None:
-            try:
-                self.model = CrossEncoder(self.model_path)
-            except Exception as e:
-                raise ValueError(f"Failed to load cross-encoder model from {self.model_path}: {e}") from e
-
-    def score_batch(self, query: str, chunks: list[Chunk]) -> list[float]:
-        """Score chunks using cross-encoder model."""
-        self._load_model()
-
-        if not chunks:
-            return []
-
-        # Prepare input pairs for cross-encoder
-        pairs = [(query, chunk.text) for chunk in chunks]
-
-        # Get scores from model (returns raw logits, need to convert to [0,1])
-        raw_scores = self.model.predict(pairs)  # type: ignore
-
-        # Convert to probabilities using sigmoid
-        import math
-        scores = [1.0 / (1.0 + math.exp(-score)) for score in raw_scores]
-
-        return scores
-
-
-class MxbaiScorer:
-    """MxBai reranker based scorer."""
-
-    def __init__(self, model_path: str = "mixedbread-ai/mxbai-rerank-base-v2"):
-        """Initialize MxBai reranker."""
-        if not HAS_MXBAI:
-            raise ImportError("mxbai-rerank required for MxbaiScorer")
-
-        self.model_path = model_path
-        self.model = None
-
-    def _load_model(self) -> None:
-        """Lazy load the model."""
-        if self.model is None:
-            # Ensure HuggingFace token is available and authenticate
-            hf_token = os.getenv("HUGGINGFACE_HUB_TOKEN")
-            if not hf_token:
-                raise ValueError(
-                    "HUGGINGFACE_HUB_TOKEN environment variable is required for MxBai reranker. "
-                    "Please set it in your .env file or environment."
-                )
-            
-            # Authenticate with HuggingFace
-            login(token=hf_token)
-            
-            try:
-                self.model = MxbaiRerankV2(self.model_path)
-                print(f"✓ Loaded MxBai reranker: {self.model_path}")
-            except Exception as e:
-                raise ValueError(f"Failed to load MxBai model from {self.model_path}: {e}") from e
-
-    def score_batch(self, query: str, chunks: list[Chunk]) -> list[float]:
-        """Score chunks using MxBai reranker."""
-        self._load_model()
-
-        if not chunks:
-            return []
-
-        # Prepare documents for MxBai
-        documents = [chunk.text for chunk in chunks]
-
-        # Get ranked results
-        results = self.model.rank(query, documents, return_documents=False)  # type: ignore
-        
-        # Extract scores (MxBai returns RankResult objects)
-        scores = [result.score for result in results]
-
-        return scores
+        # CRC32 is stable across processes, unlike the salted built-in hash()
+        hashes = np.fromiter(
+            (zlib.crc32(f"{query}|{chunk.id}|{chunk.citation}".encode(), self.seed) for chunk in chunks),
+            dtype=np.uint32,
+            count=len(chunks)
+        )
+        return (hashes % 1000) / 1000.0 * 0.8 + 0.1  # Range 0.1-0.9
 
 
 class ChunkScorer:
@@ -169,19 +96,28 @@ class ChunkScorer:
         """Initialize chunk scorer."""
         self.config = config
         self.batch_size = getattr(config, 'batch_size', 32)
+        self.token_budget = getattr(config, 'token_budget', None)
 
         if use_mock:
             self.scorer: Scorer = MockScorer()
             print("Using MockScorer for testing")
         elif HAS_MXBAI:
             # Prefer MxBai reranker as primary scorer
-            self.scorer = MxbaiScorer(model_path=config.model_path)
+            self.scorer = MxbaiScorer(
+                model_path=config.model_path,
+                fp16=config.scorer_fp16,
+                num_workers=config.scorer_workers
+            )
             print(f"Using MxBaiScorer with model: {config.model_path}")
         elif HAS_SENTENCE_TRANSFORMERS:
             # Fallback to sentence-transformers
             self.scorer = CrossEncoderScorer(
                 model_path=config.model_path,
-                batch_size=self.batch_size
+                batch_size=self.batch_size,
+                backend=config.scorer_backend,
+                quantize=config.scorer_quantize,
+                fp16=config.scorer_fp16,
+                token_cache_size=config.scorer_token_cache
             )
             print(f"Using CrossEncoderScorer with model: {config.model_path}")
         else:
@@ -189,109 +125,209 @@ class ChunkScorer:
             self.scorer = MockScorer()
             print("Using MockScorer (no other scorers available)")
 
-    def score_chunks(self, query: str, chunks: list[Chunk]) -> list[ScoredChunk]:
+    def close(self) -> None:
+        """Release the underlying scorer's resources, such as worker processes."""
+        close = getattr(self.scorer, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> "ChunkScorer":
+        """Return the scorer."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Release the underlying scorer's resources."""
+        self.close()
+
+    def _length_sorted_batches(
+        self,
+        table: ChunkTable,
+        query_tokens: int = 0,
+        order: list[int] | None = None
+    ) -> Iterator[list[int]]:
+        """Yield batches of chunk indices in text-length order to minimize padding.
+
+        Batches hold `batch_size` chunks, or as many as fit in `token_budget` when it is set.
+        Every padded row carries the query and the pair's special tokens as well as the
+        chunk, so those count against the budget too. `order` batches the chunks in a
+        caller-chosen order instead of by length.
+        """
+        order_idx = np.argsort(table.text_lengths, kind='stable').tolist() if order is None else order
+
+        if self.token_budget is None:
+            for i in range(0, len(order_idx), self.batch_size):
+                yield order_idx[i:i + self.batch_size]
+            return
+
+        # Size batches so that padded tokens (longest row x batch size) stay within budget
+        tokens = (table.tokens + (query_tokens + PAIR_SPECIAL_TOKENS)).tolist()
+        batch: list[int] = []
+        running_max = 0
+        for i in order_idx:
+            max_len = max(running_max, tokens[i])
+            if batch and max_len * (len(batch) + 1) > self.token_budget:
+                yield batch
+                batch = []
+                max_len = tokens[i]
+
+            batch.append(i)
+            running_max = max_len
+
+        if batch:
+            yield batch
+
+    def _score_batches(
+        self,
+        query: str,
+        chunks: list[Chunk],
+        order: list[int] | None = None
+    ) -> Generator[tuple[list[int], np.ndarray], None, None]:
+        """Yield (chunk indices, scores) per batch, preparing the next batch while one is scored.
+
+        Batches follow `order` when given, and text-length order otherwise.
+        """
+        query_tokens = count_tokens(query) if self.token_budget is not None else 0
+        batches = list(self._length_sorted_batches(ChunkTable.from_chunks(chunks), query_tokens, order))
+        if not batches:
+            return
+
+        if not isinstance(self.scorer, PrefetchScorer):
+            for idx_batch in batches:
+                raw_scores = self.scorer.score_batch(query, [chunks[i] for i in idx_batch])
+                yield idx_batch, np.asarray(raw_scores, dtype=np.float64)
+            return
+
+        scorer = self.scorer
+
+        # One-slot pipeline: tokenization of batch n+1 overlaps inference on batch n
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            def prefetch(idx_batch: list[int]) -> Future[Any]:
+                return executor.submit(scorer.encode, query, [chunks[i] for i in idx_batch])
+
+            pending = prefetch(batches[0])
+            for n, idx_batch in enumerate(batches):
+                inputs = pending.result()
+                if n + 1 < len(batches):
+                    pending = prefetch(batches[n + 1])
+
+                yield idx_batch, np.asarray(scorer.score_encoded(inputs), dtype=np.float64)
+
+    def _score_in_order(self, query: str, chunks: list[Chunk]) -> np.ndarray:
+        """Score chunks in length-sorted batches and return the scores in input order."""
+        scores = np.zeros(len(chunks))
+
+        # Batch similar-length chunks together, then scatter scores back to input order
+        for idx_batch, batch_scores in self._score_batches(query, chunks):
+            scores[idx_batch] = batch_scores
+
+        return scores
+
+    def score_chunks(self, query: str, chunks: list[Chunk], include_text: bool = False) -> list[ScoredChunk]:
         """Score all chunks against query with batching."""
         if not chunks:
             return []
 
         scored_chunks = []
+        scores = self._score_in_order(query, chunks)
 
-        # Process chunks in batches
-        for i in range(0, len(chunks), self.batch_size):
-            batch = chunks[i:i + self.batch_size]
-            batch_scores = self.scorer.score_batch(query, batch)
-
-            # Create scored chunks
-            for chunk, score in zip(batch, batch_scores, strict=False):
-                scored_chunk = ScoredChunk(
-                    id=chunk.id,
-                    doc_id=chunk.doc_id,
-                    order=chunk.order,
-                    text=chunk.text,
-                    tokens=chunk.tokens,
-                    citation=chunk.citation,
-                    score=score
-                )
-                scored_chunks.append(scored_chunk)
+        # Create scored chunks, converting to Python floats in one pass
+        for chunk, score in zip(chunks, scores.tolist(), strict=True):
+            scored_chunks.append(ScoredChunk.from_chunk(chunk, score, include_text))
 
         return scored_chunks
 
-    def score_chunks_streaming(self, query: str, chunks: list[Chunk]) -> Iterator[ScoredChunk]:
-        """Score chunks in batches and yield results as they're ready."""
-        if not chunks:
-            return
+    def score_chunks_streaming(
+        self,
+        query: str,
+        chunks: list[Chunk],
+        include_text: bool = False
+    ) -> Iterator[ScoredChunk]:
+        """Score chunks in batches and yield results as they're ready, in input order.
 
-        # Process chunks in batches
-        for i in range(0, len(chunks), self.batch_size):
-            batch = chunks[i:i + self.batch_size]
-            batch_scores = self.scorer.score_batch(query, batch)
-
-            # Yield scored chunks
-            for chunk, score in zip(batch, batch_scores, strict=False):
-                scored_chunk = ScoredChunk(
-                    id=chunk.id,
-                    doc_id=chunk.doc_id,
-                    order=chunk.order,
-                    text=chunk.text,
-                    tokens=chunk.tokens,
-                    citation=chunk.citation,
-                    score=score
-                )
-                yield scored_chunk
+        Chunks are length-sorted only within windows of STREAM_WINDOW_BATCHES batches,
+        and each window is yielded once it has been scored.
+        """
+        window = STREAM_WINDOW_BATCHES * self.batch_size
+
+        for start in range(0, len(chunks), window):
+            window_chunks = chunks[start:start + window]
+            scores = self._score_in_order(query, window_chunks)
+
+            for chunk, score in zip(window_chunks, scores.tolist(), strict=True):
+                yield ScoredChunk.from_chunk(chunk, score, include_text)
+
+
+def _score_record(chunk: ScoredChunk) -> dict[str, Any]:
+    """JSONL record for a scored chunk."""
+    return {
+        'id': chunk.id,
+        'order': chunk.order,
+        'tokens': chunk.tokens,
+        'score': chunk.score,
+        'citation': chunk.citation
+    }
+
+
+class ScoreWriter:
+    """Keeps a scores JSONL file open across many appends, e.g. while streaming scores."""
+
+    def __init__(self, output_path: str | Path, mode: str = 'ab'):
+        """Prepare to write `output_path`; mode 'ab' appends and 'wb' truncates."""
+        self.output_path = Path(output_path)
+        self.mode = mode
+        self.file: IO[bytes] | None = None
+
+    def __enter__(self) -> "ScoreWriter":
+        """Open the output file."""
+        self.file = open(self.output_path, self.mode, buffering=WRITE_BUFFER_SIZE)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Flush and close the output file."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def append(self, scored_chunks: Iterable[ScoredChunk]) -> None:
+        """Write a batch of scored chunks."""
+        assert self.file is not None, "ScoreWriter must be used as a context manager"
+        self.file.writelines(orjson.dumps(_score_record(chunk)) + b'\n' for chunk in scored_chunks)
 
 
 def write_scores_jsonl(scored_chunks: list[ScoredChunk], output_path: str | Path) -> None:
     """Write scored chunks to JSONL file."""
     output_path = Path(output_path)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for chunk in scored_chunks:
-            chunk_data = {
-                'id': chunk.id,
-                'order': chunk.order,
-                'tokens': chunk.tokens,
-                'score': chunk.score,
-                'citation': chunk.citation
-            }
-            f.write(json.dumps(chunk_data) + '\n')
+    with ScoreWriter(output_path, mode='wb') as writer:
+        writer.append(scored_chunks)
 
     print(f"Wrote {len(scored_chunks)} scored chunks to {output_path}")
 
 
 def append_scores_jsonl(scored_chunks: list[ScoredChunk], output_path: str | Path) -> None:
     """Append scored chunks to JSONL file (for streaming)."""
-    output_path = Path(output_path)
+    with ScoreWriter(output_path) as writer:
+        writer.append(scored_chunks)
 
-    with open(output_path, 'a', encoding='utf-8') as f:
-        for chunk in scored_chunks:
-            chunk_data = {
-                'id': chunk.id,
-                'order': chunk.order,
-                'tokens': chunk.tokens,
-                'score': chunk.score,
-                'citation': chunk.citation
-            }
-            f.write(json.dumps(chunk_data) + '\n')
 
-
-def read_scores_jsonl(input_path: str | Path) -> list[ScoredChunk]:
-    """Read scored chunks from JSONL file."""
+def iter_scores_jsonl(input_path: str | Path) -> Iterator[ScoredChunk]:
+    """Yield scored chunks from a JSONL file one line at a time."""
     input_path = Path(input_path)
-    scored_chunks = []
 
-    with open(input_path, encoding='utf-8') as f:
+    with open(input_path, 'rb') as f:
         for line in f:
             if line.strip():
-                data = json.loads(line)
-                scored_chunk = ScoredChunk(
+                data = orjson.loads(line)
+                yield ScoredChunk(
                     id=data['id'],
                     doc_id='',  # Not stored in scores JSONL
                     order=data['order'],
-                    text='',    # Not stored in scores JSONL
                     tokens=data['tokens'],
                     citation=data['citation'],
                     score=data['score']
                 )
-                scored_chunks.append(scored_chunk)
 
-    return scored_chunks
+
+def read_scores_jsonl(input_path: str | Path) -> list[ScoredChunk]:
+    """Read scored chunks from JSONL file."""
+    return list(iter_scores_jsonl(input_path))
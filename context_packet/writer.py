@@ -1,16 +1,21 @@
 """Output writers for chunks and context files."""
 
-import json
+from collections.abc import Iterator
 from pathlib import Path
 
+import orjson
+
 from .chunker import Chunk
 
+# Output buffer size for JSONL writers; large buffers keep write syscalls rare
+WRITE_BUFFER_SIZE = 1 << 20
+
 
 def write_chunks_jsonl(chunks: list[Chunk], output_path: str | Path) -> None:
     """Write chunks to JSONL file."""
     output_path = Path(output_path)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
+    with open(output_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
         for chunk in chunks:
             chunk_data = {
                 'id': chunk.id,
@@ -20,21 +25,21 @@ def write_chunks_jsonl(chunks: list[Chunk], output_path: str | Path) -> None:
                 'tokens': chunk.tokens,
                 'citation': chunk.citation
             }
-            f.write(json.dumps(chunk_data) + '\n')
+            f.write(orjson.dumps(chunk_data))
+            f.write(b'\n')
 
     print(f"Wrote {len(chunks)} chunks to {output_path}")
 
 
-def read_chunks_jsonl(input_path: str | Path) -> list[Chunk]:
-    """Read chunks from JSONL file."""
+def iter_chunks_jsonl(input_path: str | Path) -> Iterator[Chunk]:
+    """Yield chunks from a JSONL file one line at a time."""
     input_path = Path(input_path)
-    chunks = []
 
-    with open(input_path, encoding='utf-8') as f:
+    with open(input_path, 'rb') as f:
         for line in f:
             if line.strip():
-                data = json.loads(line)
-                chunk = Chunk(
+                data = orjson.loads(line)
+                yield Chunk(
                     id=data['id'],
                     doc_id=data['doc_id'],
                     order=data['order'],
@@ -44,9 +49,11 @@ def read_chunks_jsonl(input_path: str | Path) -> list[Chunk]:
                     start_offset=0,  # These aren't stored in JSONL
                     end_offset=0
                 )
-                chunks.append(chunk)
 
-    return chunks
+
+def read_chunks_jsonl(input_path: str | Path) -> list[Chunk]:
+    """Read chunks from JSONL file."""
+    return list(iter_chunks_jsonl(input_path))
 
 
 def write_context_json(
@@ -58,24 +65,27 @@ def write_context_json(
     """Write final context JSON file."""
     output_path = Path(output_path)
 
+    # Build the chunk records and the token total in a single pass
+    total_tokens = 0
+    out_chunks = []
+    for chunk in chunks:
+        total_tokens += chunk.tokens
+        out_chunks.append({
+            'id': chunk.id,
+            'order': chunk.order,
+            'text': chunk.text,
+            'tokens': chunk.tokens,
+            'score': getattr(chunk, 'score', 0.0),  # Score added later
+            'citation': chunk.citation
+        })
+
     context_data = {
         'query': query,
-        'chunks': [
-            {
-                'id': chunk.id,
-                'order': chunk.order,
-                'text': chunk.text,
-                'tokens': chunk.tokens,
-                'score': getattr(chunk, 'score', 0.0),  # Score added later
-                'citation': chunk.citation
-            }
-            for chunk in chunks
-        ],
+        'chunks': out_chunks,
         'limits': limits
     }
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(context_data, f, indent=2, ensure_ascii=False)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(context_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
-    total_tokens = sum(chunk.tokens for chunk in chunks)
     print(f"Wrote context with {len(chunks)} chunks ({total_tokens} tokens) to {output_path}")
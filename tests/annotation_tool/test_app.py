@@ -0,0 +1,78 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import orjson
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "annotation_tool"))
+
+pytest.importorskip("fasthtml")
+from starlette.testclient import TestClient  # noqa: E402
+
+CHUNKS = [
+    {"id": f"c{i}", "doc_id": "doc", "order": i, "text": f"chunk {i} “über”", "tokens": 3, "citation": f"§doc:T:{i}:{i + 1}"}
+    for i in range(5)
+]
+
+
+def write_chunks(path: Path, chunks: list[dict]) -> None:
+    path.write_bytes(b"".join(orjson.dumps(chunk) + b"\n" for chunk in chunks))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """A fresh import of the app, serving a small chunks.jsonl from a temporary directory."""
+    write_chunks(tmp_path / "chunks.jsonl", CHUNKS)
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop("app", None)
+    module = importlib.import_module("app")
+    yield module
+    module.annotation_writer.close()
+    module.annotation_log.file.close()
+    module.chunks_file.close()
+    sys.modules.pop("app", None)
+
+
+def test_read_chunk_uses_offset_index(app):
+    assert app.chunk_order == [chunk["id"] for chunk in CHUNKS]
+    assert [app.read_chunk(chunk["id"]) for chunk in CHUNKS] == CHUNKS
+
+
+def test_read_chunk_survives_chunks_file_replacement(app, tmp_path):
+    replacement = [dict(chunk, id=f"new{i}", text="x" * (i + 20)) for i, chunk in enumerate(CHUNKS)]
+    write_chunks(tmp_path / "chunks.new", replacement)
+    os.replace(tmp_path / "chunks.new", tmp_path / "chunks.jsonl")
+
+    assert app.read_chunk("c3") == CHUNKS[3]
+
+
+def test_cursor_skips_annotated_chunks(app):
+    app.set_annotation("q1", "c1", 1)
+    assert app.next_idx["q1"] == 0
+
+    app.set_annotation("q1", "c0", 0)
+    assert app.next_idx["q1"] == 2
+    assert app.next_idx["q2"] == 0
+
+
+def test_export_streams_all_data_and_revalidates(app):
+    client = TestClient(app.app)
+    app.set_annotation("q1", "c0", 1)
+
+    response = client.get("/export")
+    etag = response.headers["ETag"]
+    export = orjson.loads(response.content)
+
+    assert response.status_code == 200
+    assert export["chunks"] == CHUNKS
+    assert export["queries"] == app.TEST_QUERIES
+    assert export["annotations"]["q1"]["c0"]["relevance"] == 1
+    assert client.get("/export", headers={"If-None-Match": etag}).status_code == 304
+
+    # A new annotation changes the ETag before the log is flushed
+    app.set_annotation("q1", "c1", 0)
+    response = client.get("/export", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
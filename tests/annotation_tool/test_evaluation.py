@@ -0,0 +1,102 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import orjson
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "annotation_tool"))
+
+pytest.importorskip("sklearn")
+
+import evaluation  # noqa: E402
+
+
+def labelled_scores(n: int, seed: int) -> tuple[list[int], list[float]]:
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 2, n)
+    # Rounded so that ties between scores are common
+    scores = np.round(np.clip(0.3 * labels + rng.normal(0.4, 0.2, n), 0, 1), 2)
+    return labels.tolist(), scores.tolist()
+
+
+def brute_force_f1(labels: list[int], scores: list[float], thresholds) -> np.ndarray:
+    return np.array([evaluation.calculate_f1_at_threshold(labels, scores, float(t))["f1"] for t in thresholds])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_f1_sweep_matches_per_threshold_f1(seed):
+    labels, scores = labelled_scores(200, seed)
+    thresholds = np.unique(scores)
+
+    f1 = evaluation.f1_sweep(np.asarray(labels, dtype=np.int64), np.asarray(scores), thresholds)
+
+    np.testing.assert_allclose(f1, brute_force_f1(labels, scores, thresholds), atol=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_optimal_threshold_beats_percentile_grid(seed):
+    labels, scores = labelled_scores(200, seed)
+    # The original search only tried every 5th percentile
+    grid = np.unique(np.percentile(scores, np.arange(0, 101, 5)))
+
+    result = evaluation.find_optimal_threshold(labels, scores)
+
+    best = brute_force_f1(labels, scores, np.unique(scores)).max()
+    assert result["f1"] == pytest.approx(best)
+    assert result["f1"] >= brute_force_f1(labels, scores, grid).max() - 1e-12
+    assert evaluation.calculate_f1_at_threshold(labels, scores, result["threshold"])["f1"] == pytest.approx(best)
+
+
+def test_sweep_path_matches_precision_recall_curve_path(monkeypatch):
+    labels, scores = labelled_scores(300, 7)
+    expected = evaluation.find_optimal_threshold(labels, scores)
+
+    # Force the kernel path; without Numba installed it runs as plain Python
+    monkeypatch.setattr(evaluation, "HAS_NUMBA", True)
+    monkeypatch.setattr(evaluation, "NUMBA_SWEEP_MIN", 0)
+    result = evaluation.find_optimal_threshold(labels, scores)
+
+    assert result == pytest.approx(expected)
+
+
+def test_single_class_labels():
+    result = evaluation.find_optimal_threshold([1, 1, 1], [0.2, 0.5, 0.9])
+
+    assert result["f1"] == pytest.approx(1.0)
+
+
+@pytest.fixture
+def eval_cache(tmp_path, monkeypatch):
+    inputs = [tmp_path / "chunks.jsonl", tmp_path / "scores.jsonl"]
+    for path in inputs:
+        path.write_text("", encoding="utf-8")
+    monkeypatch.setattr(evaluation, "EVAL_INPUTS", inputs)
+    monkeypatch.setattr(evaluation, "EVAL_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(evaluation, "EVAL_CACHE_FILE", tmp_path / "cache" / "evaluation.json")
+
+    runs = []
+
+    def run_full_evaluation():
+        runs.append(1)
+        return {"run": len(runs)}
+
+    monkeypatch.setattr(evaluation, "run_full_evaluation", run_full_evaluation)
+    return inputs, runs
+
+
+def test_eval_cache_reuses_result_until_inputs_change(eval_cache):
+    inputs, runs = eval_cache
+
+    assert evaluation.cached_full_evaluation() == {"run": 1}
+    assert evaluation.cached_full_evaluation() == {"run": 1}
+    assert len(runs) == 1
+
+    inputs[0].write_text('{"id": "c0"}\n', encoding="utf-8")
+    stat = inputs[0].stat()
+    os.utime(inputs[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert evaluation.cached_full_evaluation() == {"run": 2}
+    # One entry only: the newest result replaces the previous one
+    assert orjson.loads(evaluation.EVAL_CACHE_FILE.read_bytes())["evaluation"] == {"run": 2}
@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "annotation_tool"))
+
+import storage  # noqa: E402
+
+
+@pytest.fixture
+def annotations_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "ANNOTATIONS_FILE", tmp_path / "annotations.json")
+    monkeypatch.setattr(storage, "ANNOTATIONS_LOG", tmp_path / "annotations.log.jsonl")
+    return tmp_path
+
+
+def record(relevance: int) -> dict:
+    return {"relevance": relevance, "timestamp": f"2025-01-01T00:00:{relevance:02d}"}
+
+
+def test_log_round_trip(annotations_dir):
+    annotations = {}
+    log = storage.AnnotationLog(annotations)
+    for i in range(5):
+        annotations.setdefault("q1", {})[f"c{i}"] = record(i % 2)
+        log.append("q1", f"c{i}", record(i % 2))
+    log.file.close()
+
+    assert not storage.ANNOTATIONS_FILE.exists()
+    assert storage.load_annotations() == annotations
+
+
+def test_later_log_entries_override_snapshot(annotations_dir):
+    storage.save_annotations({"q1": {"c0": record(0), "c1": record(0)}})
+
+    log = storage.AnnotationLog(storage.load_annotations())
+    log.append("q1", "c1", record(1))
+    log.file.close()
+
+    assert storage.load_annotations() == {"q1": {"c0": record(0), "c1": record(1)}}
+
+
+def test_compaction_folds_log_into_snapshot(annotations_dir, monkeypatch):
+    monkeypatch.setattr(storage, "COMPACT_MIN_BYTES", 256)
+
+    annotations = {}
+    log = storage.AnnotationLog(annotations)
+    for i in range(50):
+        annotations.setdefault(f"q{i % 3}", {})[f"c{i}"] = record(i % 2)
+        log.append(f"q{i % 3}", f"c{i}", record(i % 2))
+    log.file.close()
+
+    assert storage.ANNOTATIONS_FILE.exists()
+    # Entries written before the last compaction live only in the snapshot
+    assert len(storage.ANNOTATIONS_LOG.read_bytes().splitlines()) < 50
+    assert storage.load_annotations() == annotations
+
+
+def test_torn_log_line_is_skipped(annotations_dir):
+    log = storage.AnnotationLog({})
+    log.append("q1", "c0", record(1))
+    log.file.write(b'{"q": "q1", "c": "c1", "r"')
+    log.file.close()
+
+    assert storage.load_annotations() == {"q1": {"c0": record(1)}}
+
+
+def test_writer_flushes_on_close(annotations_dir):
+    annotations = {}
+    writer = storage.AnnotationWriter(storage.AnnotationLog(annotations), interval=0.01)
+    for i in range(10):
+        annotations.setdefault("q1", {})[f"c{i}"] = record(1)
+        writer.put("q1", f"c{i}", record(1))
+    writer.close()
+    writer.log.file.close()
+
+    assert storage.load_annotations() == annotations
@@ -0,0 +1,101 @@
+import hashlib
+from pathlib import Path
+
+from context_packet import cache
+from context_packet.ingest import FileInfo
+from context_packet.parser import ParsedDocument, PlaintextParser
+
+
+class CountingParser(PlaintextParser):
+    """Plaintext parser that counts parses and reports a configurable backend."""
+
+    def __init__(self, backend: str = "plaintext"):
+        self.backend_name = backend
+        self.parses = 0
+
+    def backend(self, file_info: FileInfo) -> str:
+        return self.backend_name
+
+    def parse(self, file_info: FileInfo) -> ParsedDocument:
+        self.parses += 1
+        return super().parse(file_info)
+
+
+def make_file(tmp_path: Path, name: str, text: str) -> FileInfo:
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return FileInfo(
+        path=path,
+        content_hash=hashlib.sha256(text.encode()).hexdigest(),
+        size=len(text),
+        extension="txt",
+        relative_path=name
+    )
+
+
+def test_cache_hit_skips_parsing(tmp_path):
+    file_info = make_file(tmp_path, "a.txt", "provenance of pointers")
+    parser = CountingParser()
+
+    first = cache.get_or_parse(file_info, parser, tmp_path / "cache")
+    second = cache.get_or_parse(file_info, parser, tmp_path / "cache")
+
+    assert parser.parses == 1
+    assert second == first
+
+
+def test_cache_hit_attaches_current_file_info(tmp_path):
+    parser = CountingParser()
+    cache.get_or_parse(make_file(tmp_path, "a.txt", "same text"), parser, tmp_path / "cache")
+
+    moved = make_file(tmp_path, "b.txt", "same text")
+    doc = cache.get_or_parse(moved, parser, tmp_path / "cache")
+
+    assert parser.parses == 1
+    assert doc.file_info is moved
+
+
+def test_changed_content_misses(tmp_path):
+    parser = CountingParser()
+    cache.get_or_parse(make_file(tmp_path, "a.txt", "old text"), parser, tmp_path / "cache")
+
+    doc = cache.get_or_parse(make_file(tmp_path, "a.txt", "new text"), parser, tmp_path / "cache")
+
+    assert parser.parses == 2
+    assert doc.text == "new text"
+
+
+def test_changed_backend_misses(tmp_path):
+    file_info = make_file(tmp_path, "a.txt", "provenance of pointers")
+    cache.get_or_parse(file_info, CountingParser("plaintext"), tmp_path / "cache")
+
+    parser = CountingParser("other")
+    cache.get_or_parse(file_info, parser, tmp_path / "cache")
+
+    assert parser.parses == 1
+
+
+def test_version_bump_misses(tmp_path, monkeypatch):
+    file_info = make_file(tmp_path, "a.txt", "provenance of pointers")
+    cache.get_or_parse(file_info, CountingParser(), tmp_path / "cache")
+
+    monkeypatch.setattr(cache, "PARSE_CACHE_VERSION", cache.PARSE_CACHE_VERSION + 1)
+    parser = CountingParser()
+    cache.get_or_parse(file_info, parser, tmp_path / "cache")
+
+    assert parser.parses == 1
+
+
+def test_corrupt_entry_is_reparsed_and_overwritten(tmp_path):
+    file_info = make_file(tmp_path, "a.txt", "provenance of pointers")
+    cache.get_or_parse(file_info, CountingParser(), tmp_path / "cache")
+
+    path = cache.cache_path(file_info, tmp_path / "cache", "plaintext")
+    path.write_bytes(path.read_bytes()[:10])
+
+    parser = CountingParser()
+    doc = cache.get_or_parse(file_info, parser, tmp_path / "cache")
+    again = cache.get_or_parse(file_info, parser, tmp_path / "cache")
+
+    assert parser.parses == 1
+    assert doc.text == again.text == "provenance of pointers"
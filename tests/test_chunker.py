@@ -0,0 +1,92 @@
+import pytest
+
+from context_packet import chunker
+from context_packet.chunker import PARALLEL_CHUNK_MIN_DOCS, Chunk, SlidingWindowChunker, chunk_documents
+from context_packet.ingest import FileInfo
+from context_packet.parser import ParsedDocument
+
+
+class CharEncoding:
+    """Offline stand-in for tiktoken: one token per character."""
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        return [ord(c) for c in text]
+
+    def encode_ordinary_batch(self, texts: list[str], num_threads: int = 1) -> list[list[int]]:
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(map(chr, tokens))
+
+    def decode_batch(self, batch: list[list[int]], num_threads: int = 1) -> list[str]:
+        return [self.decode(tokens) for tokens in batch]
+
+
+@pytest.fixture
+def char_encoding(monkeypatch):
+    encoding = CharEncoding()
+    monkeypatch.setattr(chunker, "_get_encoding", lambda name: encoding)
+    return encoding
+
+
+def make_doc(i: int, n_chars: int) -> ParsedDocument:
+    file_info = FileInfo(path=None, content_hash=f"{i:064x}", size=n_chars, extension="txt", relative_path=f"{i}.txt")
+    text = "".join(chr(97 + (i + j) % 26) for j in range(n_chars))
+    return ParsedDocument(file_info=file_info, text=text, media_type="text")
+
+
+def reference_chunks(doc: ParsedDocument, chunk_size: int, overlap: int, encoding) -> list[Chunk]:
+    """The original one-window-at-a-time chunking loop."""
+    tokens = encoding.encode_ordinary(doc.text)
+    sha = doc.file_info.content_hash
+    padding, middle_size = overlap // 2, chunk_size - overlap
+
+    if len(tokens) <= chunk_size:
+        spans = [(0, len(tokens))]
+    else:
+        spans = []
+        for start in range(0, len(tokens), chunk_size - overlap):
+            end = min(start + chunk_size, len(tokens))
+            if end - start >= chunk_size:
+                spans.append((start + padding, start + padding + middle_size))
+            else:
+                spans.append((start, end))
+
+    return [
+        Chunk(f"{sha[:8]}_c{order}", sha, order, encoding.decode(tokens[start:end]), end - start,
+              f"§{sha}:T:{start}:{end}", start, end)
+        for order, (start, end) in enumerate(spans)
+    ]
+
+
+@pytest.mark.parametrize("n_chars", [0, 1, 64, 65, 100, 128, 129, 1000])
+def test_chunks_match_reference(char_encoding, n_chars):
+    doc = make_doc(0, n_chars)
+
+    chunks = list(SlidingWindowChunker(chunk_size=64, overlap=32).chunk_document(doc))
+
+    assert chunks == reference_chunks(doc, 64, 32, char_encoding)
+
+
+def test_chunk_documents_orders_chunks_globally(char_encoding):
+    docs = [make_doc(i, 50 + 40 * i) for i in range(4)]
+
+    chunks = chunk_documents(docs, SlidingWindowChunker(chunk_size=64, overlap=32), max_workers=1)
+
+    expected = [chunk for doc in docs for chunk in reference_chunks(doc, 64, 32, char_encoding)]
+    for order, chunk in enumerate(expected):
+        chunk.order = order
+    assert chunks == expected
+
+
+def test_parallel_chunking_matches_inline():
+    try:
+        chunker_ = SlidingWindowChunker(chunk_size=64, overlap=32)
+    except Exception as e:  # tiktoken downloads its encodings on first use
+        pytest.skip(f"tiktoken encoding unavailable: {e}")
+    docs = [make_doc(i, 200 + 37 * i) for i in range(PARALLEL_CHUNK_MIN_DOCS)]
+
+    inline = chunk_documents(docs, chunker_, max_workers=1)
+    parallel = chunk_documents(docs, chunker_, max_workers=2)
+
+    assert parallel == inline
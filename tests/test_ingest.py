@@ -0,0 +1,88 @@
+import hashlib
+import os
+
+import pytest
+
+from context_packet.config import Config
+from context_packet.ingest import (
+    compute_file_hash,
+    hash_and_load,
+    ingest_corpus,
+    ingest_corpus_with_duplicates,
+    walk_directory,
+)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / "a.txt").write_text("alpha", encoding="utf-8")
+    (tmp_path / "B.MD").write_text("beta", encoding="utf-8")
+    (tmp_path / "skip.csv").write_text("not included", encoding="utf-8")
+    (tmp_path / ".hidden.txt").write_text("hidden", encoding="utf-8")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config.txt").write_text("hidden dir", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "copy.txt").write_text("alpha", encoding="utf-8")
+    (tmp_path / "sub" / "empty.txt").write_bytes(b"")
+    return tmp_path
+
+
+def relative_paths(files):
+    return sorted(file_info.relative_path for file_info in files)
+
+
+def test_walk_skips_hidden_and_excluded_files(corpus):
+    files = list(walk_directory(corpus, Config(include_extensions=["txt", "md"])))
+
+    assert relative_paths(files) == ["B.MD", "a.txt", os.path.join("sub", "copy.txt"), os.path.join("sub", "empty.txt")]
+    by_path = {file_info.relative_path: file_info for file_info in files}
+    assert by_path["B.MD"].extension == "md"
+    assert by_path["a.txt"].sha256 == hashlib.sha256(b"alpha").hexdigest()
+    assert by_path["a.txt"].raw_bytes == b"alpha"
+
+
+def test_walk_non_recursive(corpus):
+    files = list(walk_directory(corpus, Config(include_extensions=["txt"], recursive=False)))
+
+    assert relative_paths(files) == ["a.txt"]
+
+
+def test_walk_follows_file_symlinks_but_not_directory_symlinks(corpus, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    (outside / "far.txt").write_text("far away", encoding="utf-8")
+    os.symlink(outside, corpus / "linked_dir")
+    os.symlink(outside / "far.txt", corpus / "linked.txt")
+
+    files = list(walk_directory(corpus, Config(include_extensions=["txt"], recursive=True)))
+
+    assert "linked.txt" in relative_paths(files)
+    assert not any(path.startswith("linked_dir") for path in relative_paths(files))
+
+
+def test_ingest_drops_duplicate_contents(corpus):
+    config = Config(include_extensions=["txt", "md"])
+
+    files, dupes = ingest_corpus_with_duplicates(corpus, config)
+
+    assert len(files) == 3
+    assert sum(len(paths) for paths in dupes.values()) == 1
+    assert relative_paths(ingest_corpus(corpus, config)) == relative_paths(files)
+
+
+def test_hashes_agree_across_read_paths(corpus):
+    for path in (corpus / "a.txt", corpus / "sub" / "empty.txt"):
+        expected = hashlib.sha256(path.read_bytes()).hexdigest()
+        assert compute_file_hash(path) == expected
+        assert hash_and_load(path) == (expected, path.read_bytes())
+
+
+def test_blake3_ids_name_the_algorithm(corpus):
+    blake3 = pytest.importorskip("blake3")
+
+    files = list(walk_directory(corpus, Config(include_extensions=["txt"], hash_algo="blake3", recursive=False)))
+
+    digest = blake3.blake3(b"alpha").hexdigest()
+    assert files[0].content_hash == digest == compute_file_hash(corpus / "a.txt", "blake3")
+    assert files[0].file_id == f"blake3-{digest}"
+    with pytest.raises(AttributeError):
+        _ = files[0].sha256
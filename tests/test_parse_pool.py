@@ -0,0 +1,35 @@
+from context_packet.config import Config
+from context_packet.ingest import walk_directory
+from context_packet.parse_pool import PARALLEL_PARSE_MIN_FILES, parse_documents
+
+
+def write_corpus(tmp_path, n):
+    for i in range(n):
+        (tmp_path / f"doc{i:02d}.txt").write_text(f"document {i}\r\nline two of {i}\n", encoding="utf-8")
+    (tmp_path / "notes.md").write_text("# heading\n", encoding="utf-8")
+
+
+def test_pooled_parse_matches_inline_in_input_order(tmp_path):
+    write_corpus(tmp_path, 3 * PARALLEL_PARSE_MIN_FILES)
+    config = Config(include_extensions=["txt", "md"])
+
+    inline = parse_documents(walk_directory(tmp_path, config), max_workers=1)
+    pooled = parse_documents(walk_directory(tmp_path, config), max_workers=2)
+
+    assert [doc.file_info.relative_path for doc in pooled] == [doc.file_info.relative_path for doc in inline]
+    assert [doc.text for doc in pooled] == [doc.text for doc in inline]
+    texts = {doc.file_info.relative_path: doc.text for doc in inline}
+    assert texts["doc00.txt"] == "document 0\nline two of 0\n"
+    assert all(doc.file_info.raw_bytes is None for doc in inline + pooled)
+
+
+def test_parse_errors_skip_only_the_failing_file(tmp_path):
+    write_corpus(tmp_path, 2)
+    files = list(walk_directory(tmp_path, Config(include_extensions=["txt", "md"])))
+    missing = files[0]
+    missing.raw_bytes = None
+    missing.path.unlink()
+
+    docs = parse_documents(files, max_workers=1)
+
+    assert [doc.file_info.relative_path for doc in docs] == [file_info.relative_path for file_info in files[1:]]
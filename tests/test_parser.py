@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from context_packet import parser
+from context_packet.ingest import FileInfo
+
+HTML = (
+    "<html><head><title> Pointer ✓ provenance </title><style>p { color: red }</style></head><body>"
+    + "".join(f"<p>paragraph {i} über 日本語</p><script>track({i})</script>\n\n\n" for i in range(3000))
+    + "</body></html>"
+)
+
+
+def html_file(tmp_path: Path, text: str, in_memory: bool) -> FileInfo:
+    path = tmp_path / "page.html"
+    path.write_text(text, encoding="utf-8")
+    raw = text.encode("utf-8") if in_memory else None
+    return FileInfo(
+        path=path,
+        content_hash="0" * 64,
+        size=len(text),
+        extension="html",
+        relative_path="page.html",
+        raw_bytes=raw
+    )
+
+
+def parse_with(monkeypatch, backend: str, file_info: FileInfo) -> parser.ParsedDocument:
+    monkeypatch.setattr(parser, "HAS_LXML", backend == "lxml")
+    monkeypatch.setattr(parser, "HAS_SELECTOLAX", backend == "lexbor")
+    monkeypatch.setattr(parser, "HAS_BS4", backend == "bs4")
+    return parser.HTMLParser().parse(file_info)
+
+
+@pytest.mark.parametrize("backend, module", [("lexbor", "selectolax"), ("bs4", "bs4")])
+def test_html_backends_match_lxml(tmp_path, monkeypatch, backend, module):
+    pytest.importorskip("lxml")
+    pytest.importorskip(module)
+    file_info = html_file(tmp_path, HTML, in_memory=True)
+
+    expected = parse_with(monkeypatch, "lxml", file_info)
+    doc = parse_with(monkeypatch, backend, file_info)
+
+    assert doc.text == expected.text
+    assert doc.metadata == expected.metadata == {"title": "Pointer ✓ provenance"}
+    assert "track(" not in doc.text and "color" not in doc.text
+
+
+def test_lxml_reads_file_in_blocks_like_in_memory_bytes(tmp_path, monkeypatch):
+    pytest.importorskip("lxml")
+    assert len(HTML.encode()) > 2 * parser.HTML_FEED_SIZE
+
+    in_memory = parse_with(monkeypatch, "lxml", html_file(tmp_path, HTML, in_memory=True))
+    from_path = parse_with(monkeypatch, "lxml", html_file(tmp_path, HTML, in_memory=False))
+
+    assert from_path.text == in_memory.text
+    assert from_path.metadata == in_memory.metadata
+
+
+def test_lxml_empty_file(tmp_path, monkeypatch):
+    pytest.importorskip("lxml")
+
+    doc = parse_with(monkeypatch, "lxml", html_file(tmp_path, "", in_memory=True))
+
+    assert doc.text == ""
+    assert doc.metadata == {"title": ""}
@@ -0,0 +1,98 @@
+import random
+import string
+
+import numpy as np
+import pytest
+
+from context_packet.chunker import Chunk
+from context_packet.rerankers import CrossEncoderScorer
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("sentence_transformers")
+
+MAX_LENGTH = 64
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """A tiny randomly initialised BERT cross-encoder saved to disk."""
+    path = tmp_path_factory.mktemp("tiny_cross_encoder")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += list(string.ascii_lowercase) + [f"##{c}" for c in string.ascii_lowercase]
+    (path / "vocab.txt").write_text("\n".join(vocab))
+
+    tokenizer = transformers.BertTokenizerFast(str(path / "vocab.txt"), model_max_length=MAX_LENGTH)
+    torch.manual_seed(0)
+    model = transformers.BertForSequenceClassification(transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=MAX_LENGTH,
+        num_labels=1
+    ))
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return str(path)
+
+
+def words(n: int, seed: int) -> str:
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 8))) for _ in range(n))
+
+
+def make_chunks(n: int) -> list[Chunk]:
+    chunks = []
+    for i in range(n):
+        text = words(5 + 7 * i, seed=i)
+        chunks.append(Chunk(f"c{i}", "doc", i, text, len(text.split()), f"§doc:T:{i}:{i + 1}", i, i + 1))
+    return chunks
+
+
+def predict(scorer: CrossEncoderScorer, query: str, chunks: list[Chunk]) -> np.ndarray:
+    """Reference scores from CrossEncoder.predict, with the sigmoid applied in float64."""
+    raw = scorer.model.predict([(query, chunk.text) for chunk in chunks], activation_fn=torch.nn.Identity())
+    return 1.0 / (1.0 + np.exp(-np.asarray(raw, dtype=np.float64)))
+
+
+@pytest.mark.parametrize("query_words", [1, 10, 30, 80])
+def test_scores_match_predict(model_path, query_words):
+    # 30 and 80 words exceed half and all of the pair length, forcing query truncation
+    scorer = CrossEncoderScorer(model_path, backend="torch", fp16=False, token_cache_size=100)
+    chunks = make_chunks(12)
+    query = words(query_words, seed=99)
+
+    scores = scorer.score_batch(query, chunks)
+
+    np.testing.assert_allclose(scores, predict(scorer, query, chunks), atol=1e-6)
+
+
+def test_cached_tokens_reused_across_queries(model_path):
+    scorer = CrossEncoderScorer(model_path, backend="torch", fp16=False, token_cache_size=100)
+    chunks = make_chunks(12)
+    scorer.score_batch("first query", chunks)
+    assert set(scorer.token_cache) == {chunk.id for chunk in chunks}
+
+    scores = scorer.score_batch("second query", chunks)
+
+    np.testing.assert_allclose(scores, predict(scorer, "second query", chunks), atol=1e-6)
+
+
+def test_token_cache_is_bounded(model_path):
+    scorer = CrossEncoderScorer(model_path, backend="torch", fp16=False, token_cache_size=3)
+    chunks = make_chunks(5)
+
+    scorer.score_batch("query", chunks)
+
+    assert list(scorer.token_cache) == ["c2", "c3", "c4"]
+    assert all(ids.dtype == np.int32 for ids in scorer.token_cache.values())
+
+
+def test_token_cache_off_by_default(model_path):
+    scorer = CrossEncoderScorer(model_path, backend="torch", fp16=False)
+
+    scorer.score_batch("query", make_chunks(5))
+
+    assert not scorer.token_cache
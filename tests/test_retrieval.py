@@ -0,0 +1,118 @@
+import numpy as np
+
+from context_packet.chunker import Chunk
+from context_packet.config import Config
+from context_packet.retrieval import bm25_scores, score_top_k
+from context_packet.scorer import ChunkScorer, MockScorer
+
+
+def make_chunks(texts: list[str]) -> list[Chunk]:
+    return [
+        Chunk(f"c{i}", "doc", i, text, len(text.split()), f"§doc:T:{i}:{i + 1}", i, i + 1)
+        for i, text in enumerate(texts)
+    ]
+
+
+class NeedleScorer:
+    """Scores chunks mentioning "needle" highest, counting how many chunks it scores."""
+
+    def __init__(self):
+        self.scored = 0
+
+    def score_batch(self, query: str, chunks: list[Chunk]) -> list[float]:
+        self.scored += len(chunks)
+        return [0.9 if "needle" in chunk.text else 0.1 for chunk in chunks]
+
+
+class PrefetchNeedleScorer(NeedleScorer):
+    """NeedleScorer split into encode/score_encoded, so ChunkScorer prefetches its inputs."""
+
+    def __init__(self):
+        super().__init__()
+        self.encoded = 0
+
+    def encode(self, query: str, chunks: list[Chunk]) -> list[Chunk]:
+        self.encoded += len(chunks)
+        return chunks
+
+    def score_encoded(self, inputs: list[Chunk]) -> list[float]:
+        return self.score_batch("", inputs)
+
+
+def test_bm25_ranks_matching_texts_first():
+    scores = bm25_scores("memory provenance", [
+        "unrelated text about cooking",
+        "pointer provenance in the memory model",
+        "memory allocation"
+    ])
+
+    assert scores[0] == 0
+    assert scores[1] > scores[2] > 0
+
+
+def test_bm25_empty_inputs():
+    assert bm25_scores("query", []).shape == (0,)
+    np.testing.assert_array_equal(bm25_scores("!!!", ["some text"]), [0.0])
+
+
+def test_score_top_k_matches_full_sort():
+    chunks = make_chunks([f"chunk {i} about memory {'model ' * (i % 4)}" for i in range(60)])
+    chunk_scorer = ChunkScorer(Config(), use_mock=True)
+    chunk_scorer.batch_size = 8
+
+    top = score_top_k(chunk_scorer, "memory model", chunks, k=10, patience=len(chunks))
+
+    expected = np.sort(MockScorer().score_batch("memory model", chunks))[::-1][:10]
+    np.testing.assert_allclose([chunk.score for chunk in top], expected)
+    assert len({chunk.id for chunk in top}) == 10
+
+
+def test_score_top_k_stops_early():
+    texts = [f"filler text {i}" for i in range(100)]
+    for i in (17, 42, 88):
+        texts[i] = f"the needle is here {i}"
+    chunk_scorer = ChunkScorer(Config(), use_mock=True)
+    chunk_scorer.scorer = scorer = NeedleScorer()
+    chunk_scorer.batch_size = 4
+
+    top = score_top_k(chunk_scorer, "needle", make_chunks(texts), k=3, patience=1, include_text=True)
+
+    assert {chunk.id for chunk in top} == {"c17", "c42", "c88"}
+    assert all("needle" in chunk.text for chunk in top)
+    assert scorer.scored == 8
+
+
+def test_score_top_k_uses_prefetching_batches():
+    texts = [f"filler text {i}" for i in range(100)]
+    texts[42] = "the needle is here"
+    chunk_scorer = ChunkScorer(Config(), use_mock=True)
+    chunk_scorer.scorer = scorer = PrefetchNeedleScorer()
+    chunk_scorer.batch_size = 4
+
+    top = score_top_k(chunk_scorer, "needle", make_chunks(texts), k=1, patience=1)
+
+    assert [chunk.id for chunk in top] == ["c42"]
+    assert scorer.scored == 8
+    # At most one batch is prepared ahead of the last one scored
+    assert scorer.encoded <= 12
+
+
+def test_score_top_k_scores_everything_without_bm25_signal():
+    texts = [f"filler text {i}" for i in range(100)]
+    texts[90] = "the needle is here"
+    chunk_scorer = ChunkScorer(Config(), use_mock=True)
+    chunk_scorer.scorer = scorer = NeedleScorer()
+    chunk_scorer.batch_size = 4
+
+    # No query word appears in any chunk, so BM25 can't order them
+    top = score_top_k(chunk_scorer, "haystack", make_chunks(texts), k=1, patience=1)
+
+    assert [chunk.id for chunk in top] == ["c90"]
+    assert scorer.scored == 100
+
+
+def test_score_top_k_empty():
+    chunk_scorer = ChunkScorer(Config(), use_mock=True)
+
+    assert score_top_k(chunk_scorer, "query", [], k=5) == []
+    assert score_top_k(chunk_scorer, "query", make_chunks(["text"]), k=0) == []
@@ -0,0 +1,65 @@
+import numpy as np
+
+from context_packet.chunker import Chunk, ChunkTable
+from context_packet.config import Config
+from context_packet.scorer import PAIR_SPECIAL_TOKENS, STREAM_WINDOW_BATCHES, ChunkScorer, MockScorer
+
+
+def make_chunks(n: int) -> list[Chunk]:
+    # Lengths cycle so that length-sorted batches differ from input order
+    return [
+        Chunk(f"c{i}", "doc", i, "word " * ((i * 7) % 23 + 1), (i * 7) % 23 + 1, f"§doc:T:{i}:{i + 1}", i, i + 1)
+        for i in range(n)
+    ]
+
+
+def mock_chunk_scorer(batch_size: int = 4) -> ChunkScorer:
+    chunk_scorer = ChunkScorer(Config(), use_mock=True)
+    chunk_scorer.batch_size = batch_size
+    return chunk_scorer
+
+
+def test_length_sorted_batches_cover_every_chunk_once():
+    chunks = make_chunks(50)
+    table = ChunkTable.from_chunks(chunks)
+
+    batches = list(mock_chunk_scorer()._length_sorted_batches(table))
+
+    assert sorted(i for batch in batches for i in batch) == list(range(50))
+    assert all(len(batch) <= 4 for batch in batches)
+    lengths = [len(chunks[i].text) for batch in batches for i in batch]
+    assert lengths == sorted(lengths)
+
+
+def test_score_chunks_returns_input_order():
+    chunks = make_chunks(50)
+
+    scored = mock_chunk_scorer().score_chunks("query", chunks)
+
+    assert [chunk.id for chunk in scored] == [chunk.id for chunk in chunks]
+    np.testing.assert_allclose([chunk.score for chunk in scored], MockScorer().score_batch("query", chunks))
+
+
+def test_streaming_matches_score_chunks_in_input_order():
+    chunk_scorer = mock_chunk_scorer()
+    chunks = make_chunks(3 * STREAM_WINDOW_BATCHES * chunk_scorer.batch_size + 5)
+
+    streamed = list(chunk_scorer.score_chunks_streaming("query", chunks))
+
+    assert streamed == chunk_scorer.score_chunks("query", chunks)
+    assert list(chunk_scorer.score_chunks_streaming("query", [])) == []
+
+
+def test_token_budget_counts_padded_rows_with_query_and_special_tokens():
+    chunks = make_chunks(60)
+    table = ChunkTable.from_chunks(chunks)
+    chunk_scorer = mock_chunk_scorer()
+    chunk_scorer.token_budget = 200
+    query_tokens = 10
+
+    batches = list(chunk_scorer._length_sorted_batches(table, query_tokens))
+
+    assert sorted(i for batch in batches for i in batch) == list(range(60))
+    for batch in batches:
+        row = max(chunks[i].tokens for i in batch) + query_tokens + PAIR_SPECIAL_TOKENS
+        assert len(batch) == 1 or row * len(batch) <= chunk_scorer.token_budget
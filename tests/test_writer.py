@@ -0,0 +1,70 @@
+import json
+
+from context_packet.chunker import Chunk
+from context_packet.scorer import (
+    ScoredChunk,
+    ScoreWriter,
+    append_scores_jsonl,
+    iter_scores_jsonl,
+    read_scores_jsonl,
+    write_scores_jsonl,
+)
+from context_packet.writer import iter_chunks_jsonl, read_chunks_jsonl, write_chunks_jsonl, write_context_json
+
+
+def make_chunks(n: int) -> list[Chunk]:
+    return [
+        Chunk(f"c{i}", "doc", i, f"chunk {i} — naïve “quotes” \\ 日本語\n", 3 + i, f"§doc:T:{i}:{i + 1}", 0, 0)
+        for i in range(n)
+    ]
+
+
+def test_chunks_jsonl_matches_json_records_and_round_trips(tmp_path):
+    chunks = make_chunks(5)
+    path = tmp_path / "chunks.jsonl"
+
+    write_chunks_jsonl(chunks, path)
+
+    # Each line decodes to the record the json module used to write, "id" first
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": c.id, "doc_id": c.doc_id, "order": c.order, "text": c.text, "tokens": c.tokens, "citation": c.citation}
+        for c in chunks
+    ]
+    assert all(line.startswith('{"id":') for line in lines)
+    assert read_chunks_jsonl(path) == chunks
+    assert list(iter_chunks_jsonl(path)) == chunks
+
+
+def test_scores_jsonl_write_append_and_read(tmp_path):
+    scored = [ScoredChunk.from_chunk(chunk, 0.25 * i) for i, chunk in enumerate(make_chunks(4))]
+    path = tmp_path / "scores.jsonl"
+
+    write_scores_jsonl(scored[:2], path)
+    append_scores_jsonl(scored[2:3], path)
+    with ScoreWriter(path) as writer:
+        writer.append(scored[3:])
+
+    # doc_id and text aren't stored in scores.jsonl
+    expected = [ScoredChunk(c.id, "", c.order, c.tokens, c.citation, c.score) for c in scored]
+    assert read_scores_jsonl(path) == expected
+    assert list(iter_scores_jsonl(path)) == expected
+
+
+def test_context_json_matches_json_dump(tmp_path):
+    chunks = make_chunks(3)
+    limits = {"large": 32000, "small": 8000}
+    path = tmp_path / "context.json"
+
+    write_context_json("what is provenance?", chunks, limits, path)
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "query": "what is provenance?",
+        "chunks": [
+            {"id": c.id, "order": c.order, "text": c.text, "tokens": c.tokens, "score": 0.0, "citation": c.citation}
+            for c in chunks
+        ],
+        "limits": limits
+    }
+    # Non-ASCII text is written as-is, as with json.dump(ensure_ascii=False)
+    assert "日本語" in path.read_text(encoding="utf-8")